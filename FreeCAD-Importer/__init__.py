@@ -32,9 +32,13 @@ import bpy
 from rna_prop_ui import PropertyPanel
 from bpy_extras.io_utils import ImportHelper
 
+from time import perf_counter
 import os
 
-from .helper import importFCStd
+from .helper import iterImportFCStd
+from .helper import runImport
+from .helper import realizeProxies
+from .worker import closeWorkerPool
 
 
 bl_info = {'name':        'FreeCAD-Importer',
@@ -73,36 +77,242 @@ class ImportFreeCAD(bpy.types.Operator, ImportHelper):
     option_tessellation:  bpy.props.FloatProperty(name='Tessellation', default=1.0,
                           description='The tessellation value to apply when triangulating shapes')
 
+    option_adaptive:      bpy.props.BoolProperty(name='Adaptive tessellation', default=False,
+                          description='Scale the tessellation deflection to the size of each shape instead of using the tessellation value')
+
+    option_relative:      bpy.props.FloatProperty(name='Relative deflection (%)', default=0.1, min=0.001, max=10.0, precision=3,
+                          description='In adaptive tessellation, the linear deflection as a percentage of the shape bounding box diagonal')
+
+    option_angular:       bpy.props.FloatProperty(name='Angular deflection (°)', default=28.5, min=1.0, max=90.0,
+                          description='In adaptive tessellation, the maximum angle between the normals of adjacent triangles')
+
+    option_normals:       bpy.props.BoolProperty(name='Smooth normals', default=False,
+                          description='Set the normals of the FreeCAD surfaces as custom split normals, curved shapes look smooth with a coarser tessellation')
+
+    option_lods:          bpy.props.IntProperty(name='Levels of detail', default=0, min=0, max=4,
+                          description='Number of lower detail meshes tessellated for each shape, they can be swapped in with Object > FreeCAD Level of Detail')
+
+    option_mergedistance: bpy.props.FloatProperty(name='Merge distance', default=0.0, min=0.0, precision=4,
+                          description='Vertices closer than this distance are merged. Default value of 0 only merges identical vertices')
+
     option_scale:         bpy.props.FloatProperty(name='Scaling', default=0.001, precision=3,
                           description='A scaling value to apply to imported objects. Default value of 0.001 means one Blender unit = 1 meter')
 
     option_newcollection: bpy.props.BoolProperty(name='New collection', default=False,
                           description='Create a new collection in the scene')
 
+    option_incremental:   bpy.props.BoolProperty(name='Incremental import', default=False,
+                          description='Only update objects whose shape, placement or material changed since the last import')
+
+    option_removemissing: bpy.props.BoolProperty(name='Remove missing objects', default=False,
+                          description='Remove objects that no longer exist in the FreeCAD document')
+
+    option_instancing:    bpy.props.BoolProperty(name='Share identical meshes', default=False,
+                          description='Objects with identical geometry and materials (App::Link, clones, arrays...) share the same mesh, finding them needs to hash the geometry of every shape')
+
+    option_deferred:      bpy.props.BoolProperty(name='Deferred geometry', default=False,
+                          description='Import shapes as bounding box proxies, their geometry can be imported later with Object > FreeCAD Realize Proxies')
+
+    option_include:       bpy.props.StringProperty(name='Include',
+                          description='Only import the objects whose Label or Name match one of these comma separated glob patterns')
+
+    option_exclude:       bpy.props.StringProperty(name='Exclude',
+                          description='Do not import the objects whose Label or Name match one of these comma separated glob patterns')
+
+    option_groups:        bpy.props.StringProperty(name='Groups',
+                          description='Only import the objects of the groups whose Label or Name match one of these comma separated glob patterns')
+
+    option_types:         bpy.props.EnumProperty(name='Types', options={'ENUM_FLAG'}, default={'Part', 'Mesh', 'Material'},
+                          items=(('Part', 'Part', 'Import the Part shapes'),
+                                 ('Mesh', 'Mesh', 'Import the meshes'),
+                                 ('Material', 'Material', 'Import the materials')),
+                          description='The types of FreeCAD objects to import')
+
+    option_workers:       bpy.props.IntProperty(name='Tessellation workers', default=0, min=0, max=64,
+                          description='Number of FreeCAD processes used to tessellate shapes in parallel. Default value of 0 tessellates in Blender')
+
+    option_memory:        bpy.props.IntProperty(name='Memory budget (MB)', default=0, min=0,
+                          description='When Blender and the tessellation workers get close to this budget, the workers send fewer objects in advance and the meshes kept for identical shapes are released. Without workers the budget is not enforced, only these meshes are released. Default value of 0 means no budget')
+
+    option_persistent:    bpy.props.BoolProperty(name='Keep workers running', default=False,
+                          description='Tessellation workers keep the FreeCAD documents open, so the next imports of these documents are faster and Blender does not need to load them')
+
+    option_verbose:       bpy.props.BoolProperty(name='Verbose', default=False,
+                          description='Print a message for each imported object in the console')
+
+    option_modal:         bpy.props.BoolProperty(name='Modal import', default=True,
+                          description='Import from the file browser in small steps with a progress bar, the import can be cancelled with Esc')
+
+    # the events that only move the view are still handled by Blender during a modal import
+    navigation = {'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE',
+                  'TRACKPADPAN', 'TRACKPADZOOM', 'NDOF_MOTION'}
+
     # invoke is called when the user picks our Import menu entry.
     def invoke(self, context, event):
         path = bpy.context.preferences.addons[__name__].preferences.dirpath
         if path and os.path.isdir(path):
             self.directory = path
+        # only an import started from the file browser can run as a modal operator
+        self._invoked = True
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
     
     # execute is called when the user is done using the modal file-select window.
     def execute(self, context):
+        importers = self._getImporters(context)
+        # scripts and redo call execute() directly and expect the import to be done when it returns
+        invoked = getattr(self, '_invoked', False)
+        self._invoked = False
+        if self.option_modal and invoked and context.window_manager.windows and not bpy.app.background:
+            # the import is done by the timer events of the modal() method
+            self._importers = importers
+            self._count = len(importers)
+            self._result = {'CANCELLED'}
+            self._timer = context.window_manager.event_timer_add(0.01, window=context.window)
+            context.window_manager.modal_handler_add(self)
+            context.window_manager.progress_begin(0, 100)
+            return {'RUNNING_MODAL'}
+        result = {'CANCELLED'}
+        for importer in importers:
+            if runImport(importer) == {'FINISHED'}:
+                result = {'FINISHED'}
+        return result
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            # the current object is always completely imported before cancelling
+            for importer in self._importers:
+                importer.close()
+            self._importers = []
+            self.report({'WARNING'}, 'Import cancelled')
+            return self._finish(context, {'FINISHED'})
+        if event.type in self.navigation:
+            return {'PASS_THROUGH'}
+        if event.type != 'TIMER':
+            # the collection and the datablocks held by the import must not be edited or undone
+            return {'RUNNING_MODAL'}
+        # import objects for a tenth of second before giving back the control to Blender
+        start = perf_counter()
+        while self._importers and perf_counter() - start < 0.1:
+            try:
+                done, total = next(self._importers[0])
+            except StopIteration as e:
+                self._importers.pop(0)
+                if e.value == {'FINISHED'}:
+                    self._result = {'FINISHED'}
+                continue
+            except Exception as e:
+                # the failed import is already closed, the following ones are not started
+                for importer in self._importers:
+                    importer.close()
+                self._importers = []
+                self.report({'ERROR'}, f"FreeCAD import failed: {e}")
+                return self._finish(context, {'CANCELLED'})
+            index = self._count - len(self._importers)
+            progress = 100 * (index + done / max(total, 1)) / max(self._count, 1)
+            context.window_manager.progress_update(progress)
+            context.workspace.status_text_set(f"FreeCAD import: file {index + 1}/{self._count}, "
+                                              f"object {done + 1}/{total} (Esc to cancel)")
+        if self._importers:
+            return {'RUNNING_MODAL'}
+        return self._finish(context, self._result)
+
+    def cancel(self, context):
+        for importer in self._importers:
+            importer.close()
+        self._finish(context, {'CANCELLED'})
+
+    def _finish(self, context, result):
+        context.window_manager.event_timer_remove(self._timer)
+        context.window_manager.progress_end()
+        context.workspace.status_text_set(None)
+        return result
+
+    def _getImporters(self, context):
+        preferences = context.preferences.addons[__name__].preferences
         dir = self.directory
+        # all the selected files share the same material table
+        materials = {}
+        importers = []
         for file in self.files:
             filename = str(file.name)
             if filename.lower().endswith('.fcstd'):
-                return importFCStd(path=dir,
-                                   filename=filename,
-                                   skiphidden=self.option_skiphidden,
-                                   placement=self.option_placement,
-                                   allmaterial=self.option_allmaterial,
-                                   aspolygons=self.option_aspolygons,
-                                   tessellation=self.option_tessellation,
-                                   scale=self.option_scale,
-                                   newcollection=self.option_newcollection,
-                                   report=self.report)
+                importers.append(iterImportFCStd(path=dir,
+                                                 filename=filename,
+                                                 skiphidden=self.option_skiphidden,
+                                                 placement=self.option_placement,
+                                                 allmaterial=self.option_allmaterial,
+                                                 aspolygons=self.option_aspolygons,
+                                                 tessellation=self.option_tessellation,
+                                                 mergedistance=self.option_mergedistance,
+                                                 relative=self.option_relative if self.option_adaptive else 0.0,
+                                                 angular=self.option_angular if self.option_adaptive else 0.0,
+                                                 normals=self.option_normals,
+                                                 lods=self.option_lods,
+                                                 scale=self.option_scale,
+                                                 newcollection=self.option_newcollection,
+                                                 incremental=self.option_incremental,
+                                                 removemissing=self.option_removemissing,
+                                                 instancing=self.option_instancing,
+                                                 deferred=self.option_deferred,
+                                                 include=_getPatterns(self.option_include),
+                                                 exclude=_getPatterns(self.option_exclude),
+                                                 types=tuple(self.option_types),
+                                                 groups=_getPatterns(self.option_groups),
+                                                 workers=self.option_workers,
+                                                 persistent=self.option_persistent,
+                                                 memory=self.option_memory,
+                                                 cachedir=bpy.path.abspath(preferences.cachedir),
+                                                 cachesize=preferences.cachesize,
+                                                 materials=materials,
+                                                 verbose=self.option_verbose,
+                                                 statsdir=bpy.path.abspath(preferences.statsdir),
+                                                 report=self.report))
+        return importers
+
+
+def _getPatterns(text):
+    return tuple(pattern.strip() for pattern in text.split(',') if pattern.strip())
+
+
+class LevelOfDetail(bpy.types.Operator):
+
+    """Swaps the mesh of the selected objects with one of their FreeCAD levels of detail"""
+    bl_idname =  'object.freecad_lod'
+    bl_label =   'FreeCAD Level of Detail'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    level: bpy.props.IntProperty(name='Level', default=0, min=0, max=4,
+           description='The level of detail, 0 is the full detail mesh')
+
+    def execute(self, context):
+        for bobj in context.selected_objects:
+            if bobj.type != 'MESH' or 'LODs' not in bobj.data:
+                continue
+            names = bobj.data['LODs']
+            bmesh = bpy.data.meshes.get(names[min(self.level, len(names) - 1)])
+            if bmesh is not None and bmesh is not bobj.data:
+                # the swapped out mesh must be kept
+                bobj.data.use_fake_user = True
+                bobj.data = bmesh
+        return {'FINISHED'}
+
+
+class RealizeProxies(bpy.types.Operator):
+
+    """Tessellates the shapes of FreeCAD proxy objects and swaps in their real geometry"""
+    bl_idname =  'object.freecad_realize'
+    bl_label =   'FreeCAD Realize Proxies'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    objects: bpy.props.EnumProperty(name='Objects', default='SELECTED',
+             items=(('SELECTED', 'Selected', 'Realize the selected proxies'),
+                    ('VISIBLE', 'Visible', 'Realize the visible proxies')))
+
+    def execute(self, context):
+        bobjs = context.selected_objects if self.objects == 'SELECTED' else context.visible_objects
+        if not realizeProxies(bobjs, report=self.report):
+            return {'CANCELLED'}
         return {'FINISHED'}
 
 
@@ -113,10 +323,26 @@ class ImportPreferences(bpy.types.AddonPreferences):
     dirpath : bpy.props.StringProperty(name='FCStd file directory',
                                        subtype='DIR_PATH')
 
+    cachedir : bpy.props.StringProperty(name='Tessellation cache directory',
+                                        subtype='DIR_PATH',
+                                        description='Tessellated shapes are kept in this directory to speed up re-imports. Leave empty to disable the cache')
+
+    cachesize : bpy.props.IntProperty(name='Tessellation cache size (MB)', default=1024, min=1,
+                                      description='Least recently used shapes are removed from the cache above this size')
+
+    statsdir : bpy.props.StringProperty(name='Import statistics directory',
+                                        subtype='DIR_PATH',
+                                        description='The timing and statistics of each import are saved as JSON in this directory. Leave empty to disable')
+
     def draw(self, context):
         layout = self.layout
         layout.label(text='FreeCAD default document directory path')
         layout.prop(self, 'dirpath')
+        layout.label(text='FreeCAD tessellation cache')
+        layout.prop(self, 'cachedir')
+        layout.prop(self, 'cachesize')
+        layout.label(text='FreeCAD import statistics')
+        layout.prop(self, 'statsdir')
 
 
 class CustomProperties(bpy.types.Panel, PropertyPanel): 
@@ -132,6 +358,8 @@ class CustomProperties(bpy.types.Panel, PropertyPanel):
 # register plugin with Blender
 
 classes = (ImportFreeCAD,
+           LevelOfDetail,
+           RealizeProxies,
            ImportPreferences,
            CustomProperties)
 
@@ -139,12 +367,17 @@ classes = (ImportFreeCAD,
 def _menuImport(self, context):
     self.layout.operator(ImportFreeCAD.bl_idname, text='FreeCAD (.FCStd)')
 
+def _menuObject(self, context):
+    self.layout.operator(LevelOfDetail.bl_idname)
+    self.layout.operator(RealizeProxies.bl_idname)
+
 
 def register():
     from bpy.utils import register_class
     for cls in classes:
         register_class(cls)
     bpy.types.TOPBAR_MT_file_import.append(_menuImport)
+    bpy.types.VIEW3D_MT_object.append(_menuObject)
 
 
 def unregister():
@@ -152,6 +385,8 @@ def unregister():
     for cls in reversed(classes):
         unregister_class(cls)
     bpy.types.TOPBAR_MT_file_import.remove(_menuImport)
+    bpy.types.VIEW3D_MT_object.remove(_menuObject)
+    closeWorkerPool()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,199 @@
+#!
+# -*- coding: utf-8 -*-
+
+'''
+╔════════════════════════════════════════════════════════════════════════════════════╗
+║                                                                                    ║
+║   Copyright (c) 2023 https://prrvchr.github.io                                     ║
+║                                                                                    ║
+║   Permission is hereby granted, free of charge, to any person obtaining            ║
+║   a copy of this software and associated documentation files (the "Software"),     ║
+║   to deal in the Software without restriction, including without limitation        ║
+║   the rights to use, copy, modify, merge, publish, distribute, sublicense,         ║
+║   and/or sell copies of the Software, and to permit persons to whom the Software   ║
+║   is furnished to do so, subject to the following conditions:                      ║
+║                                                                                    ║
+║   The above copyright notice and this permission notice shall be included in       ║
+║   all copies or substantial portions of the Software.                              ║
+║                                                                                    ║
+║   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,                  ║
+║   EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES                  ║
+║   OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.        ║
+║   IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY             ║
+║   CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,             ║
+║   TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE       ║
+║   OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                    ║
+║                                                                                    ║
+╚════════════════════════════════════════════════════════════════════════════════════╝
+'''
+
+
+# Imports FreeCAD documents without the Blender user interface:
+#
+#   blender --background --python batch.py -- [options] file.FCStd 'models/*.FCStd'
+#
+# all documents are imported in the same Blender file, which can be saved with
+# --output, or each document can be saved in its own .blend file with --blend-dir.
+# Run with --help after the -- separator to get the list of options.
+
+import bpy
+
+from argparse import ArgumentParser
+from argparse import BooleanOptionalAction
+import importlib
+import glob
+import time
+import sys
+import os
+
+
+def getParser():
+    parser = ArgumentParser(prog='blender --background --python batch.py --',
+                            description='Imports FreeCAD .FCStd files in Blender')
+    parser.add_argument('files', nargs='+',
+                        help='FreeCAD files to import, glob patterns are allowed')
+    parser.add_argument('--skiphidden', action=BooleanOptionalAction, default=True,
+                        help='Only import objects that where visible in FreeCAD')
+    parser.add_argument('--placement', action=BooleanOptionalAction, default=True,
+                        help='Set Blender pivot points to the FreeCAD placements')
+    parser.add_argument('--allmaterial', action=BooleanOptionalAction, default=True,
+                        help='Create also unused material')
+    parser.add_argument('--aspolygons', action=BooleanOptionalAction, default=True,
+                        help='Create faces as polygons when possible')
+    parser.add_argument('--tessellation', type=float, default=1.0,
+                        help='The tessellation value to apply when triangulating shapes')
+    parser.add_argument('--mergedistance', type=float, default=0.0,
+                        help='Vertices closer than this distance are merged')
+    parser.add_argument('--relative', type=float, default=0.0,
+                        help='Adaptive tessellation: the linear deflection as a percentage of the shape size')
+    parser.add_argument('--angular', type=float, default=0.0,
+                        help='Adaptive tessellation: the angular deflection in degrees')
+    parser.add_argument('--normals', action=BooleanOptionalAction, default=False,
+                        help='Set the normals of the FreeCAD surfaces as custom split normals')
+    parser.add_argument('--lods', type=int, default=0,
+                        help='Number of lower detail meshes tessellated for each shape')
+    parser.add_argument('--scale', type=float, default=0.001,
+                        help='A scaling value to apply to imported objects')
+    parser.add_argument('--newcollection', action=BooleanOptionalAction, default=False,
+                        help='Create a new collection in the scene')
+    parser.add_argument('--incremental', action=BooleanOptionalAction, default=False,
+                        help='Only update objects whose shape, placement or material changed')
+    parser.add_argument('--removemissing', action=BooleanOptionalAction, default=False,
+                        help='Remove objects that no longer exist in the FreeCAD document')
+    parser.add_argument('--instancing', action=BooleanOptionalAction, default=False,
+                        help='Objects with identical geometry and materials share the same mesh')
+    parser.add_argument('--deferred', action=BooleanOptionalAction, default=False,
+                        help='Import shapes as bounding box proxies, to be realized later in Blender')
+    parser.add_argument('--include', action='append', default=[],
+                        help='Only import the objects whose Label or Name match this glob pattern, can be repeated')
+    parser.add_argument('--exclude', action='append', default=[],
+                        help='Do not import the objects whose Label or Name match this glob pattern, can be repeated')
+    parser.add_argument('--groups', action='append', default=[],
+                        help='Only import the objects of the groups whose Label or Name match this glob pattern, can be repeated')
+    parser.add_argument('--types', action='append', default=[], choices=('Part', 'Mesh', 'Material'),
+                        help='A type of FreeCAD objects to import, can be repeated')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Number of FreeCAD processes used to tessellate shapes in parallel')
+    parser.add_argument('--persistent', action=BooleanOptionalAction, default=False,
+                        help='Keep the FreeCAD worker processes running between the imported files')
+    parser.add_argument('--memory', type=int, default=0,
+                        help='Memory budget (MB): the workers send fewer objects in advance and the meshes kept for identical shapes '
+                             'are released when memory gets close to it. Without workers only these meshes are released')
+    parser.add_argument('--cachedir', default='',
+                        help='Tessellation cache directory, leave empty to disable the cache')
+    parser.add_argument('--cachesize', type=int, default=1024,
+                        help='Tessellation cache size (MB)')
+    parser.add_argument('--verbose', action=BooleanOptionalAction, default=False,
+                        help='Print a message for each imported object')
+    parser.add_argument('--statsdir', default='',
+                        help='Save the timing and statistics of each import as JSON in this directory')
+    parser.add_argument('--list', action='store_true',
+                        help='Only list the objects of the files with their type, groups and visibility')
+    parser.add_argument('--output', default='',
+                        help='Save all the imported documents in this .blend file')
+    parser.add_argument('--blend-dir', dest='blenddir', default='',
+                        help='Save each imported document in its own .blend file in this directory')
+    return parser
+
+def getFiles(patterns):
+    # expands the glob patterns, keeping the order and removing duplicates
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"No file matching: {pattern}")
+        for file in matches:
+            file = os.path.abspath(file)
+            if file not in files:
+                files.append(file)
+    return files
+
+def importFiles(helper, files, blenddir='', output='', **options):
+    # the FreeCAD module is loaded once and the material table is shared by all files
+    materials = {}
+    summary = []
+    for file in files:
+        if blenddir:
+            # each document is imported in an empty Blender file
+            bpy.ops.wm.read_homefile(use_empty=True)
+            materials = {}
+        stats = helper.ImportStats(os.path.basename(file), options.get('verbose', False))
+        start = time.perf_counter()
+        try:
+            result = helper.importFCStd(os.path.dirname(file) + os.sep, os.path.basename(file),
+                                        materials=materials, stats=stats, **options)
+        except Exception as e:
+            print(f"Unable to import {file}: {e}")
+            result = {'CANCELLED'}
+        elapsed = time.perf_counter() - start
+        report = stats.getReport()
+        summary.append((file, result == {'FINISHED'}, report['objects'], report['faces'], elapsed, report['memory']))
+        if blenddir and result == {'FINISHED'}:
+            name = os.path.splitext(os.path.basename(file))[0]
+            bpy.ops.wm.save_as_mainfile(filepath=os.path.join(os.path.abspath(blenddir), name + '.blend'))
+    if output:
+        bpy.ops.wm.save_as_mainfile(filepath=os.path.abspath(output))
+    return summary
+
+def listObjects(helper, files):
+    for file in files:
+        print(file)
+        for obj in helper.prescanFCStd(os.path.dirname(file) + os.sep, os.path.basename(file)):
+            groups = '/'.join(obj['Groups'])
+            visibility = '' if obj['Visibility'] else 'hidden'
+            print(f"  {obj['Name']:<24} {obj['Label'][:32]:<32} {obj['Type'] or '':<9} {groups:<32} {visibility}")
+
+def printSummary(summary):
+    print(f"{'File':<40} {'Status':<9} {'Objects':>8} {'Faces':>10} {'Time (s)':>9} {'MB/s':>8} {'Objects/s':>10}")
+    total = 0.0
+    for file, success, objects, faces, elapsed, memory in summary:
+        size = os.path.getsize(file) / 1048576 if os.path.isfile(file) else 0.0
+        rate = elapsed if elapsed > 0 else float('inf')
+        status = 'imported' if success else 'failed'
+        print(f"{os.path.basename(file)[-40:]:<40} {status:<9} {objects:>8} {faces:>10} {elapsed:>9.2f} "
+              f"{size / rate:>8.2f} {objects / rate:>10.1f}")
+        total += elapsed
+    failed = sum(1 for s in summary if not s[1])
+    memory = max((s[5] for s in summary), default=0.0)
+    print(f"{len(summary)} files processed in {total:.2f}s, {failed} failed, peak memory {memory:.0f} MB")
+    return failed
+
+def _getPackage():
+    # this script runs outside of the add-on package, which must be imported first
+    path = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(path))
+    return importlib.import_module(os.path.basename(path))
+
+def main():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    options = vars(getParser().parse_args(argv))
+    files = getFiles(options.pop('files'))
+    helper = importlib.import_module(_getPackage().__name__ + '.helper')
+    if options.pop('list'):
+        return listObjects(helper, files)
+    summary = importFiles(helper, files, **options)
+    return printSummary(summary)
+
+
+if __name__ == '__main__':
+    sys.exit(1 if main() else 0)
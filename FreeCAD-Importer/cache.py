@@ -0,0 +1,98 @@
+#!
+# -*- coding: utf-8 -*-
+
+'''
+╔════════════════════════════════════════════════════════════════════════════════════╗
+║                                                                                    ║
+║   Copyright (c) 2023 https://prrvchr.github.io                                     ║
+║                                                                                    ║
+║   Permission is hereby granted, free of charge, to any person obtaining            ║
+║   a copy of this software and associated documentation files (the "Software"),     ║
+║   to deal in the Software without restriction, including without limitation        ║
+║   the rights to use, copy, modify, merge, publish, distribute, sublicense,         ║
+║   and/or sell copies of the Software, and to permit persons to whom the Software   ║
+║   is furnished to do so, subject to the following conditions:                      ║
+║                                                                                    ║
+║   The above copyright notice and this permission notice shall be included in       ║
+║   all copies or substantial portions of the Software.                              ║
+║                                                                                    ║
+║   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,                  ║
+║   EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES                  ║
+║   OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.        ║
+║   IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY             ║
+║   CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,             ║
+║   TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE       ║
+║   OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                    ║
+║                                                                                    ║
+╚════════════════════════════════════════════════════════════════════════════════════╝
+'''
+
+import numpy as np
+
+import os
+
+from .mesh import MeshBuilder
+
+
+class TessellationCache(object):
+    # A content addressed cache of tessellated shapes stored in a directory.
+    # Each entry is a .npz file holding the mesh buffers of one shape and is keyed
+    # by the shape fingerprint, which covers the import options changing the tessellation.
+    # Least recently used entries are removed when the cache exceeds its size (in MB).
+
+    def __init__(self, directory, size=1024):
+        self._directory = directory
+        self._maxsize = size * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in self._getEntries())
+
+    def __contains__(self, key):
+        return os.path.isfile(self._getPath(key))
+
+    def get(self, key):
+        path = self._getPath(key)
+        try:
+            with np.load(path) as data:
+                builder = MeshBuilder(data['vertices'], data['loops'], data['sizes'], data['edges'], data['normals'])
+        except (OSError, KeyError, ValueError):
+            self.misses += 1
+            return None
+        # the modification time is used as the last access time of the entry
+        os.utime(path)
+        self.hits += 1
+        return builder
+
+    def put(self, key, builder):
+        path = self._getPath(key)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as f:
+            np.savez(f, vertices=builder.vertices, loops=builder.loops, sizes=builder.sizes, edges=builder.edges,
+                     normals=builder.normals)
+        self._size += os.path.getsize(temp)
+        os.replace(temp, path)
+        if self._size > self._maxsize:
+            self._evict()
+
+    def getStatistics(self):
+        return f"Tessellation cache: {self.hits} hits, {self.misses} misses, {self._size / 1048576:.1f} MB used"
+
+    def _evict(self):
+        entries = sorted(self._getEntries(), key=lambda entry: entry.stat().st_mtime)
+        self._size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self._size <= self._maxsize:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self._size -= size
+
+    def _getEntries(self):
+        return [entry for entry in os.scandir(self._directory) if entry.name.endswith('.npz')]
+
+    def _getPath(self, key):
+        return os.path.join(self._directory, key + '.npz')
@@ -0,0 +1,246 @@
+#!
+# -*- coding: utf-8 -*-
+
+'''
+╔════════════════════════════════════════════════════════════════════════════════════╗
+║                                                                                    ║
+║   Copyright (c) 2023 https://prrvchr.github.io                                     ║
+║                                                                                    ║
+║   Permission is hereby granted, free of charge, to any person obtaining            ║
+║   a copy of this software and associated documentation files (the "Software"),     ║
+║   to deal in the Software without restriction, including without limitation        ║
+║   the rights to use, copy, modify, merge, publish, distribute, sublicense,         ║
+║   and/or sell copies of the Software, and to permit persons to whom the Software   ║
+║   is furnished to do so, subject to the following conditions:                      ║
+║                                                                                    ║
+║   The above copyright notice and this permission notice shall be included in       ║
+║   all copies or substantial portions of the Software.                              ║
+║                                                                                    ║
+║   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,                  ║
+║   EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES                  ║
+║   OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.        ║
+║   IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY             ║
+║   CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,             ║
+║   TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE       ║
+║   OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                    ║
+║                                                                                    ║
+╚════════════════════════════════════════════════════════════════════════════════════╝
+'''
+
+
+# This module must not import bpy nor FreeCAD: it reads the FreeCAD document
+# directly from the FCStd zip file.
+
+import numpy as np
+
+import xml.sax
+import struct
+
+from .mesh import MeshBuilder
+
+
+def readDocument(zdoc):
+    # reads the Document.xml of an opened FCStd zip file
+    handler = DocumentHandler()
+    with zdoc.open('Document.xml') as f:
+        xml.sax.parse(f, handler)
+    return Document(handler.objects)
+
+def getGroups(document):
+    # the groups (App::DocumentObjectGroup, App::Part, PartDesign::Body...) containing
+    # each object, from the outermost to the innermost, by object Name
+    parents = {}
+    for obj in document.Objects:
+        if 'Group' in obj.PropertiesList:
+            for child in obj.Group:
+                if child is not None:
+                    parents.setdefault(child.Name, obj)
+    groups = {}
+    for obj in document.Objects:
+        chain = []
+        parent = parents.get(obj.Name)
+        while parent is not None and parent not in chain:
+            chain.insert(0, parent)
+            parent = parents.get(parent.Name)
+        groups[obj.Name] = chain
+    return groups
+
+def isNativeMesh(zdoc, obj):
+    # the meshes saved by FreeCAD 0.14 and later can be read without FreeCAD
+    filename = obj.getFileName('Mesh')
+    if filename not in zdoc.namelist():
+        return False
+    with zdoc.open(filename) as f:
+        return _isMeshHeader(f.read(8))
+
+def getMeshBuilder(zdoc, obj):
+    # decodes the mesh of a Mesh::Feature stored in the FCStd zip file, the mesh
+    # is in local coordinates. Returns None if the mesh is not in a known format.
+    if not isNativeMesh(zdoc, obj):
+        return None
+    return decodeMesh(zdoc.read(obj.getFileName('Mesh')))
+
+def decodeMesh(data):
+    # decodes a mesh in the FreeCAD native format (.bms) directly into NumPy arrays, the
+    # points stay in single precision. Returns None if the data is not in this format.
+    if len(data) < 272 or not _isMeshHeader(data[:8]):
+        return None
+    # the header is followed by 256 bytes of info, the count of points and facets,
+    # points as 3 float32, facets as 3 point and 3 neighbour uint32 and the bounding box
+    points, facets = struct.unpack_from('<II', data, 264)
+    offset = 272
+    if len(data) < offset + points * 12 + facets * 24:
+        return None
+    vertices = np.frombuffer(data, dtype='<f4', count=points * 3, offset=offset)
+    offset += points * 12
+    indices = np.frombuffer(data, dtype='<u4', count=facets * 6, offset=offset).reshape(-1, 6)
+    loops = indices[:, :3].astype(np.int32).ravel()
+    sizes = np.full(facets, 3, dtype=np.int32)
+    return MeshBuilder(vertices, loops, sizes)
+
+def _isMeshHeader(data):
+    if len(data) < 8:
+        return False
+    magic, version = struct.unpack_from('<II', data)
+    return magic == 0xA0B0C0D0 and version == 0x010000
+
+
+class Document(object):
+    # The objects of a FreeCAD document as read from Document.xml
+
+    def __init__(self, objects):
+        self.Objects = list(objects.values())
+        self._objects = objects
+        for obj in self.Objects:
+            obj.Document = self
+
+    def getObject(self, name):
+        return self._objects.get(name)
+
+
+class DocumentObject(object):
+    # A FreeCAD document object as read from Document.xml. It mimics the few
+    # FreeCAD object methods used by the importer: Link properties return
+    # the linked objects and the Placement is a (x, y, z, qx, qy, qz, qw) tuple.
+
+    _links = ('App::PropertyLink', 'App::PropertyLinkChild', 'App::PropertyLinkGlobal',
+              'App::PropertyLinkHidden', 'App::PropertyXLink')
+
+    def __init__(self, name, typeid):
+        self.Name = name
+        self.TypeId = typeid
+        self.Document = None
+        self._properties = {}
+        self._types = {}
+
+    @property
+    def PropertiesList(self):
+        return list(self._properties)
+
+    @property
+    def Label(self):
+        return self._properties.get('Label', self.Name)
+
+    def getPropertyByName(self, name):
+        value = self._properties[name]
+        if self._types[name] in self._links:
+            return self.Document.getObject(value)
+        if self._types[name] == 'App::PropertyLinkList':
+            return [self.Document.getObject(link) for link in value]
+        return value
+
+    def getFileName(self, name):
+        # the name of the file storing a shape or a mesh in the FCStd zip file
+        if self._types.get(name) in ('Part::PropertyPartShape', 'Mesh::PropertyMeshKernel'):
+            return self._properties[name]
+        return None
+
+    def getLinkedObject(self, recursive=True):
+        obj = self
+        while obj.isDerivedFrom('App::Link'):
+            linked = obj.getPropertyByName('LinkedObject') if 'LinkedObject' in obj._properties else None
+            if linked is None or linked is self:
+                break
+            obj = linked
+            if not recursive:
+                break
+        return obj
+
+    def isDerivedFrom(self, typeid):
+        # the type hierarchy is unknown, so types are deduced from their properties
+        if typeid == 'Part::Feature':
+            return self._types.get('Shape') == 'Part::PropertyPartShape'
+        if typeid == 'Mesh::Feature':
+            return self._types.get('Mesh') == 'Mesh::PropertyMeshKernel'
+        if typeid == 'App::MaterialObject':
+            return self.TypeId.startswith('App::MaterialObject')
+        return self.TypeId == typeid
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self._properties:
+            raise AttributeError(name)
+        return self.getPropertyByName(name)
+
+
+class DocumentHandler(xml.sax.ContentHandler):
+    # A XML handler to process the FreeCAD document xml data
+    # this creates a dictionary where each key is a FC object Name,
+    # and each value is a DocumentObject holding the object properties
+
+    def __init__(self):
+
+        self.objects = {}
+        self._current = None
+        self._name = None
+        self._type = None
+        self._value = None
+
+    # call when an element starts
+    def startElement(self, tag, attrs):
+
+        if tag == 'Object':
+            if 'type' in attrs:
+                self.objects[attrs['name']] = DocumentObject(attrs['name'], attrs['type'])
+            else:
+                self._current = self.objects.get(attrs['name'])
+        elif self._current is None:
+            pass
+        elif tag == 'Property':
+            self._name = attrs['name']
+            self._type = attrs['type']
+            self._value = None
+        elif self._name is None:
+            pass
+        elif tag == 'String':
+            self._value = attrs['value']
+        elif tag == 'Bool':
+            self._value = attrs['value'] == 'true'
+        elif tag == 'PropertyPlacement':
+            self._value = tuple(float(attrs[key]) for key in ('Px', 'Py', 'Pz', 'Q0', 'Q1', 'Q2', 'Q3'))
+        elif tag == 'Link':
+            if self._type == 'App::PropertyLinkList':
+                if self._value is None:
+                    self._value = []
+                self._value.append(attrs['value'])
+            else:
+                self._value = attrs['value']
+        elif tag == 'XLink':
+            self._value = attrs['name']
+        elif tag == 'Map':
+            self._value = {}
+        elif tag == 'Item' and isinstance(self._value, dict):
+            self._value[attrs['key']] = attrs['value']
+        elif tag in ('Part', 'Mesh') and 'file' in attrs:
+            self._value = attrs['file']
+
+    # call when an elements ends
+    def endElement(self, tag):
+
+        if tag == 'Property' and self._current is not None:
+            if self._value is not None:
+                self._current._properties[self._name] = self._value
+                self._current._types[self._name] = self._type
+            self._name = None
+            self._value = None
+        elif tag == 'Object':
+            self._current = None
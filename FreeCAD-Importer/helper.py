@@ -30,312 +30,790 @@
 
 import bpy
 
+import numpy as np
+
+from collections import Counter
 import xml.sax
+import fnmatch
+import hashlib
+import tempfile
 import zipfile
 import json
 import os
 
-
-def importFCStd(path,
-                filename='',
-                skiphidden=True,
-                placement=True,
-                allmaterial=True,
-                aspolygons=True,
-                tessellation=1.0,
-                scale=0.001,
-                newcollection=False,
-                report=None):
-
-    # reads a FreeCAD .FCStd file and creates Blender objects
-    try:
-        from . import FreeCAD
-    except:
-        print("Unable to import the FreeCAD Python module. Make sure it is installed on your system")
-        print("and compiled with Python3 (same version as Blender).")
-        if report:
-            report({'ERROR'}, 'Unable to import the FreeCAD Python module. Check you have same Python version for FreeCAD and Blender.')
-        return {'CANCELLED'}
+from .document import readDocument
+from .document import getGroups
+from .document import getMeshBuilder
+from .document import decodeMesh
+from .document import isNativeMesh
+from .shape import getShapeFingerprint
+from .shape import getObjectShape
+from .shape import getShapeMesh
+from .shape import getShapeProxy
+from .cache import TessellationCache
+from .worker import WorkerPool
+from .worker import getWorkerPool
+from .worker import WorkerQueue
+from .stats import ImportStats
+from .registry import DatablockRegistry
+
+# the compiled material node descriptions, by hash of the material content
+_nodes = {}
+
+
+def prescanFCStd(path, filename=''):
+    # lists the objects of a FreeCAD document without FreeCAD, as read from Document.xml and
+    # GuiDocument.xml: Name, Label, TypeId, importer type (Part, Mesh, Material or None),
+    # the Labels of the groups containing the object and the visibility
+    with zipfile.ZipFile(path + filename) as zdoc:
+        guidata = _getGuiData(zdoc)
+        document = readDocument(zdoc)
+    groups = getGroups(document)
+    return [{'Name': obj.Name,
+             'Label': obj.Label,
+             'TypeId': obj.TypeId,
+             'Type': _getType(obj),
+             'Groups': [group.Label for group in groups[obj.Name]],
+             'Visibility': guidata.get(obj.Name, True)} for obj in document.Objects]
+
+def importFCStd(path, filename='', **options):
+    # imports the whole document at once, see iterImportFCStd() for the options
+    return runImport(iterImportFCStd(path, filename, **options))
+
+def runImport(importer):
+    # runs an iterImportFCStd() generator to the end and returns its result
+    while True:
+        try:
+            next(importer)
+        except StopIteration as e:
+            return e.value
+
+def iterImportFCStd(path,
+                    filename='',
+                    skiphidden=True,
+                    placement=True,
+                    allmaterial=True,
+                    aspolygons=True,
+                    tessellation=1.0,
+                    mergedistance=0.0,
+                    relative=0.0,
+                    angular=0.0,
+                    normals=False,
+                    lods=0,
+                    scale=0.001,
+                    newcollection=False,
+                    workers=0,
+                    persistent=False,
+                    memory=0,
+                    cachedir='',
+                    cachesize=1024,
+                    incremental=False,
+                    removemissing=False,
+                    instancing=False,
+                    deferred=False,
+                    include=(),
+                    exclude=(),
+                    types=(),
+                    groups=(),
+                    materials=None,
+                    verbose=False,
+                    statsdir='',
+                    stats=None,
+                    report=None):
+
+    # reads a FreeCAD .FCStd file and creates Blender objects, this generator yields
+    # the count of processed objects and the total before each object, so the import
+    # can be done in chunks and cancelled (by closing the generator) between objects
     root = 'Blender'
+    if stats is None:
+        stats = ImportStats(filename, verbose)
+    stats.mode = 'adaptive' if relative else 'absolute'
 
-    # check if we have a GUI document
-    guidata = {}
+    # the zip file, the FreeCAD document and the workers are closed even if the import fails
     zdoc = zipfile.ZipFile(path + filename)
-    if zdoc:
-        if 'GuiDocument.xml' in zdoc.namelist():
-            gf = zdoc.open('GuiDocument.xml')
-            data = gf.read()
-            gf.close()
-            Handler = XMLHandler()
-            xml.sax.parseString(data, Handler)
-            guidata = Handler.guidata
-        zdoc.close()
-    doc = FreeCAD.open(path + filename)
-    docname = doc.Name
-    if not doc:
-        print("Unable to open the given FreeCAD file")
-        if report:
-            report({'ERROR'}, 'Unable to open the given FreeCAD file')
-        return {'CANCELLED'}
-    print (f"Transferring {len(doc.Objects)} objects to Blender")
-
-    # import some FreeCAD modules needed below. After "import FreeCAD" these modules become available
-    import Part
-
-    def hascurves(shape):
-        for e in shape.Edges:
-            if not isinstance(e.Curve, (Part.Line, Part.LineSegment)):
-                return True
-        return False
-
-    name, ext = os.path.splitext(filename)
-    if newcollection:
-        bcoll = _getNewCollection(bpy, name)
-    else:
-        bcoll = bpy.data.collections.get(name)
-    if bcoll is None:
-        bcoll = _getNewCollection(bpy, name)
-        newcollection = True
-
-    # create materials
-    materials = {m.name: m for m in bpy.data.materials}
-    i = 0
-    if allmaterial:
-        for obj in doc.Objects:
-            if obj.isDerivedFrom('App::MaterialObject'):
-                if obj.Label not in materials:
-                    print(f"Create material: {obj.Label}")
-                    bmat = bpy.data.materials.new(name=obj.Label)
-                    bmat.use_nodes = True
-                    bmat.node_tree.nodes.clear()
-                    _setMaterialNodes(bmat, obj, root)
-                    i += 1
-                    materials[obj.Label] = bmat
-    print(f"Create material Total: {i}")
-
-    # for a cleaning mesh naming we need to clean orphan mesh
-    for bmesh in bpy.data.meshes:
-        if bmesh.users == 0:
-            bpy.data.meshes.remove(bmesh)
-
-    for obj in doc.Objects:
-        print(f"Importing: {obj.Label}")
-        if skiphidden:
-            if obj.Name in guidata and not guidata[obj.Name]:
-                print(f"{obj.Label} is invisible. Skipping.")
-                continue
-
-        verts = []
-        edges = []
-        faces = []
-        faceedges = [] # a placeholder to store edges that belong to a face
-
-        if obj.isDerivedFrom('Part::Feature'):
-            # create mesh from shape
-            print(f"Create mesh from shape: {obj.Label}")
-            shape = obj.Shape
-            if placement:
-                placement = obj.Placement
-                shape = obj.Shape.copy()
-                shape.Placement = placement.inverse().multiply(shape.Placement)
-            if shape.Faces:
-                if aspolygons:
-                    # write FreeCAD faces as polygons when possible
-                    for face in shape.Faces:
-                        if (len(face.Wires) > 1) or (not isinstance(face.Surface,Part.Plane)) or hascurves(face):
-                            # face has holes or is curved, so we need to triangulate it
-                            rawdata = face.tessellate(tessellation)
-                            for v in rawdata[0]:
-                                vl = [v.x,v.y,v.z]
-                                if not vl in verts:
-                                    verts.append(vl)
-                            for f in rawdata[1]:
-                                nf = []
-                                for vi in f:
-                                    nv = rawdata[0][vi]
-                                    nf.append(verts.index([nv.x,nv.y,nv.z]))
-                                faces.append(nf)
-                        else:
-                            f = []
-                            ov = face.OuterWire.OrderedVertexes
-                            for v in ov:
-                                vl = [v.X,v.Y,v.Z]
-                                if not vl in verts:
-                                    verts.append(vl)
-                                f.append(verts.index(vl))
-                            # FreeCAD doesn't care about verts order. Make sure our loop goes clockwise
-                            c = face.CenterOfMass
-                            v1 = ov[0].Point.sub(c)
-                            v2 = ov[1].Point.sub(c)
-                            n = face.normalAt(0,0)
-                            if (v1.cross(v2)).getAngle(n) > 1.57:
-                                f.reverse() # inverting verts order if the direction is couterclockwise
-                            faces.append(f)
-                        for e in face.Edges:
-                            faceedges.append(e.hashCode())
-                else:
-                    # triangulate and make faces
-                    rawdata = shape.tessellate(tessellation)
-                    for v in rawdata[0]:
-                        verts.append([v.x,v.y,v.z])
-                    for f in rawdata[1]:
-                        faces.append(f)
-                    for face in shape.Faces:
-                        for e in face.Edges:
-                            faceedges.append(e.hashCode())
-
-            for edge in shape.Edges:
-                # Treat remaining edges (that are not in faces)
-                if not (edge.hashCode() in faceedges):
-                    if hascurves(edge):
-                        dv = edge.discretize(9) #TODO use tessellation value
-                        for i in range(len(dv)-1):
-                            dv1 = [dv[i].x,dv[i].y,dv[i].z]
-                            dv2 = [dv[i+1].x,dv[i+1].y,dv[i+1].z]
-                            if not dv1 in verts:
-                                verts.append(dv1)
-                            if not dv2 in verts:
-                                verts.append(dv2)
-                            edges.append([verts.index(dv1),verts.index(dv2)])
-                    else:
-                        e = []
-                        for vert in edge.Vertexes:
-                            # TODO discretize non-linear edges
-                            v = [vert.X,vert.Y,vert.Z]
-                            if not v in verts:
-                                verts.append(v)
-                            e.append(verts.index(v))
-                        edges.append(e)
-
-        elif obj.isDerivedFrom('Mesh::Feature'):
-            # convert freecad mesh to blender mesh
-            print(f"Convert freecad mesh to blender mesh: {obj.Label}")
-            mesh = obj.Mesh
-            if placement:
-                placement = obj.Placement
-                mesh = obj.Mesh.copy() # in meshes, this zeroes the placement
-            t = mesh.Topology
-            verts = [[v.x,v.y,v.z] for v in t[0]]
-            faces = t[1]
-
+    doc = None
+    pool = None
+    try:
+        # check if we have a GUI document
+        with stats.phase('parse'):
+            guidata = _getGuiData(zdoc)
+            # the document objects are read from the Document.xml of the zip file
+            document = readDocument(zdoc)
+            # objects can be selected by filters before anything is loaded
+            hidden = {name for name, visible in guidata.items() if skiphidden and not visible}
+            unselected = _getUnselected(document, include, exclude, types, groups)
+        print (f"Transferring {len(document.Objects) - len(unselected)} objects to Blender")
+        allmaterial = allmaterial and (not types or 'Material' in types)
+
+        # FreeCAD is only needed to tessellate shapes or to read meshes in an unknown format. Persistent
+        # workers keep the document open between imports, Blender doesn't open it if they do all the work
+        parts = [obj for obj in document.Objects if _isShape(obj) and
+                 obj.Name not in hidden and obj.Name not in unselected]
+        remote = workers and persistent and not deferred and not lods
+        if (parts and not remote) or any(obj.isDerivedFrom('Mesh::Feature') and not isNativeMesh(zdoc, obj) and
+                                         obj.Name not in hidden and obj.Name not in unselected for obj in document.Objects):
+            try:
+                with stats.phase('open'):
+                    from . import FreeCAD
+            except:
+                print("Unable to import the FreeCAD Python module. Make sure it is installed on your system")
+                print("and compiled with Python3 (same version as Blender).")
+                if report:
+                    report({'ERROR'}, 'Unable to import the FreeCAD Python module. Check you have same Python version for FreeCAD and Blender.')
+                return {'CANCELLED'}
+            with stats.phase('open'):
+                doc = FreeCAD.open(path + filename)
+            if not doc:
+                print("Unable to open the given FreeCAD file")
+                if report:
+                    report({'ERROR'}, 'Unable to open the given FreeCAD file')
+                return {'CANCELLED'}
+
+        name, ext = os.path.splitext(filename)
+        if newcollection:
+            bcoll = _getNewCollection(bpy, name)
         else:
-            print(f"Can't convert FreeCAD object: {obj.Label}")
+            bcoll = bpy.data.collections.get(name)
+        if bcoll is None:
+            bcoll = _getNewCollection(bpy, name)
+            newcollection = True
+        registry = DatablockRegistry(bcoll, filename)
+
+        # create materials, the material table can be shared between several imports
+        if materials is None:
+            materials = {}
+        i = 0
+        if allmaterial:
+            # identical materials are only created once, even if they have different labels
+            hashes = {bmat.get('MaterialHash'): bmat for bmat in materials.values() if bmat.get('MaterialHash')}
+            keys = {obj.Name: _getMaterialHash(obj) for obj in document.Objects if obj.isDerivedFrom('App::MaterialObject')}
+            for obj in document.Objects:
+                if obj.isDerivedFrom('App::MaterialObject'):
+                    if obj.Label not in materials:
+                        with stats.phase('material'):
+                            key = keys[obj.Name]
+                            bmat = hashes.get(key) or registry.getMaterial(key, obj.Label)
+                            if bmat is None:
+                                # a material edited in FreeCAD is rebuilt, the objects using it keep their slots
+                                bmat = registry.getEditedMaterial(obj.Name, set(keys.values()))
+                                if bmat is not None:
+                                    stats.log(f"Update material: {obj.Label}")
+                                    bmat.node_tree.nodes.clear()
+                                    _setMaterialNodes(bmat, _getMaterialNodes(obj, root, key))
+                                    bmat['MaterialHash'] = key
+                            if bmat is None:
+                                stats.log(f"Create material: {obj.Label}")
+                                bmat = bpy.data.materials.new(name=obj.Label)
+                                bmat.use_nodes = True
+                                bmat.node_tree.nodes.clear()
+                                _setMaterialNodes(bmat, _getMaterialNodes(obj, root, key))
+                                bmat['MaterialHash'] = key
+                                i += 1
+                            registry.addMaterial(bmat, obj.Name, key)
+                            hashes[key] = bmat
+                        materials[obj.Label] = bmat
+        print(f"Create material Total: {i}")
+
+        # for a cleaning mesh naming we need to clean the orphan meshes of previous imports
+        registry.removeOrphanMeshes()
+
+        # the import options changing the tessellation of shapes
+        options = dict(placement=placement,
+                       aspolygons=aspolygons,
+                       tessellation=tessellation,
+                       mergedistance=mergedistance,
+                       relative=relative,
+                       angular=angular,
+                       normals=normals)
+
+        # shape fingerprints are needed by the tessellation cache, the incremental import and the instancing,
+        # in deferred mode shapes are not tessellated, only their bounding box is imported as a proxy
+        cache = None
+        if cachedir and not deferred:
+            cache = TessellationCache(cachedir, cachesize)
+        keys = {}
+        if (cache or incremental or instancing) and remote and parts:
+            with stats.phase('fingerprint'):
+                futures = getWorkerPool(workers).fingerprint(path + filename, [obj.Name for obj in parts],
+                                                             **dict(options, lods=lods))
+                for name, future in futures.items():
+                    try:
+                        keys[name] = future.result()
+                    except Exception as e:
+                        print(f"Worker fingerprint failed: {e}")
+        elif (cache or incremental or instancing) and not deferred:
+            for obj in parts:
+                with stats.phase('fingerprint', obj):
+                    fcobj = doc.getObject(obj.Name)
+                    keys[obj.Name] = getShapeFingerprint(getObjectShape(fcobj), fcobj.Placement if placement else None,
+                                                         dict(options, lods=lods))
+
+        # in incremental mode, shapes of unchanged objects are not tessellated again
+        unchanged = set()
+        if incremental and not newcollection and not deferred:
+            for obj in parts:
+                bobj = bcoll.objects.get(obj.Label)
+                if bobj and obj.Name in keys and bobj.get('ShapeFingerprint') == keys[obj.Name]:
+                    unchanged.add(obj.Name)
+
+        # identical shapes are tessellated only once and their mesh buffers are kept
+        # as long as other objects need them, identical objects share the same mesh
+        counts = Counter()
+        if instancing:
+            counts.update(keys[obj.Name] for obj in parts if obj.Name in keys and obj.Name not in unchanged)
+        builders = {}
+        meshes = {}
+        instances = 0
+
+        # tessellation of shapes can be done in parallel by FreeCAD worker processes, with a bounded
+        # count of objects in flight. Persistent workers are not closed at the end of the import
+        queue = ()
+        limit = 4 * workers
+        largest = 0
+        if workers and not deferred:
+            names = []
+            submitted = set()
+            for obj in parts:
+                key = keys.get(obj.Name)
+                if obj.Name in unchanged or key in submitted or (cache and key and key in cache):
+                    continue
+                if instancing and key:
+                    submitted.add(key)
+                names.append(obj.Name)
+            if names and persistent:
+                queue = WorkerQueue(getWorkerPool(workers), path + filename, names, options, limit)
+            elif names:
+                pool = WorkerPool(min(workers, len(names)))
+                queue = WorkerQueue(pool, path + filename, names, options, limit)
+
+        for i, obj in enumerate(document.Objects):
+            try:
+                yield i, len(document.Objects)
+            except GeneratorExit:
+                print("Import cancelled")
+                raise
+            if obj.Name in unselected:
+                continue
+            stats.log(f"Importing: {obj.Label}")
+            if obj.Name in hidden:
+                stats.log(f"{obj.Label} is invisible. Skipping.")
+                continue
 
-        if verts and (faces or edges):
-            # create or update object with mesh and material data
             bobj = None
-            bmat = None
             if not newcollection:
                 # locate existing object in the collection (object with same name)
                 bobj = bcoll.objects.get(obj.Label)
-            if bobj:
-                print(f"update object: {obj.Label}")
-                # update only the mesh of existing object.
-                bobj.data.clear_geometry()
-                bobj.data.from_pydata(verts, edges, faces)
+            # App::Link objects use the materials of the linked object
+            source = obj.getLinkedObject(True) if obj.isDerivedFrom('App::Link') else obj
+            objplacement = obj.Placement if placement and 'Placement' in obj.PropertiesList else None
+            key = keys.get(obj.Name)
+            instance = None
+            bmesh = None
+            builder = None
+
+            if obj.Name in unchanged:
+                stats.log(f"{obj.Label} is unchanged")
+                if instancing:
+                    meshes.setdefault(key + _getMaterialFingerprint(source), bobj.data)
+
+            elif _isShape(obj) and deferred:
+                # create a bounding box proxy, the shape will be tessellated by realizeProxies()
+                stats.log(f"Create proxy from shape: {obj.Label}")
+                with stats.phase('proxy', obj):
+                    fcobj = doc.getObject(obj.Name)
+                    builder = getShapeProxy(getObjectShape(fcobj), fcobj.Placement if placement else None)
+
+            elif _isShape(obj):
+                # create mesh from shape
+                stats.log(f"Create mesh from shape: {obj.Label}")
+                if instancing and key:
+                    instance = key + _getMaterialFingerprint(source)
+                    bmesh = meshes.get(instance)
+                    counts[key] -= 1
+                if bmesh is not None:
+                    pass
+                elif key in builders:
+                    builder = builders[key]
+                elif cache and key:
+                    with stats.phase('cache', obj):
+                        builder = cache.get(key)
+                if bmesh is None and builder is None and obj.Name in queue:
+                    try:
+                        builder = queue.pop(obj.Name).result()
+                        _addTimings(stats, obj, builder)
+                    except Exception as e:
+                        print(f"Worker tessellation failed, tessellate in Blender: {e}")
+                    if memory and builder is not None:
+                        # the mesh buffers of the objects in flight must fit in the memory left by the budget
+                        largest = max(largest, builder.nbytes)
+                        queue.limit = max(1, min(limit, int((memory - stats.sample(queue.pids)) * 1048576 // largest)))
+                if bmesh is None and builder is None and doc is None:
+                    # without the document in Blender, a crash of FreeCAD only loses this object
+                    print(f"Unable to tessellate {obj.Label} without FreeCAD worker. Skipping.")
+                    continue
+                if bmesh is None and builder is None:
+                    fcobj = doc.getObject(obj.Name)
+                    builder = getShapeMesh(getObjectShape(fcobj), fcobj.Placement if placement else None,
+                                           aspolygons, tessellation, mergedistance, relative, angular, normals)
+                    _addTimings(stats, obj, builder)
+                if cache and key and builder is not None and key not in cache:
+                    cache.put(key, builder)
+                if counts[key] > 0 and builder is not None:
+                    builders[key] = builder
+                else:
+                    builders.pop(key, None)
+                if memory and builders and doc is not None and stats.sample() > memory:
+                    # over the budget the mesh buffers kept for identical shapes are released, these
+                    # shapes are tessellated again with the document opened in Blender. That's all the
+                    # budget can do without workers: the document and the meshes stay in Blender
+                    builders.clear()
+
+            elif obj.isDerivedFrom('Mesh::Feature'):
+                # convert freecad mesh to blender mesh
+                stats.log(f"Convert freecad mesh to blender mesh: {obj.Label}")
+                with stats.phase('mesh', obj):
+                    # meshes are decoded from the zip file, FreeCAD reads the unknown formats
+                    builder = getMeshBuilder(zdoc, obj)
+                    if builder is None:
+                        builder = decodeMesh(_getMeshData(doc.getObject(obj.Name)))
+                    if builder is None:
+                        print(f"Unable to read the mesh of {obj.Label}. Skipping.")
+                        continue
+                    if not placement:
+                        builder.transform(_getMatrix(obj.Placement))
+                if incremental or instancing:
+                    with stats.phase('fingerprint', obj):
+                        key = builder.getFingerprint()
+                if incremental and bobj and bobj.get('ShapeFingerprint') == key:
+                    stats.log(f"{obj.Label} is unchanged")
+                    builder = None
+                elif instancing:
+                    instance = key + _getMaterialFingerprint(source)
+                    bmesh = meshes.get(instance)
+                    if bmesh is not None:
+                        builder = None
+
             else:
-                # create new object
-                print(f"create new object: {obj.Label}")
-                bmesh = bpy.data.meshes.new(name=obj.Label)
-                bmesh.from_pydata(verts, edges, faces)
-                bmesh.update()
-                bobj = bpy.data.objects.new(obj.Label, bmesh)
-                bcoll.objects.link(bobj)
-                # if we want to be able to go back to FreeCAD, we need to keep the Label
-                bobj['Name'] = obj.Name
-                bobj['Label2'] = obj.getPropertyByName('Label2')
-            if placement:
-                bobj.location = placement.Base.multiply(scale)
-                m = bobj.rotation_mode
-                bobj.rotation_mode = 'QUATERNION'
-                if placement.Rotation.Angle:
-                    # FreeCAD Quaternion is XYZW while Blender is WXYZ
-                    q = (placement.Rotation.Q[3], ) + placement.Rotation.Q[:3]
-                    bobj.rotation_quaternion = (q)
-                    bobj.rotation_mode = m
-                bobj.scale = (scale,scale,scale)
-            if not allmaterial:
+                stats.log(f"Can't convert FreeCAD object: {obj.Label}")
                 continue
-            if 'Material' in obj.PropertiesList:
-                mat = obj.Material
-                # if we have material we need to add only if it doesn't exist
-                if mat and bobj.data.materials.get(mat.Label) is None:
-                    if mat.Label in materials:
-                        bobj.data.materials.append(materials[mat.Label])
-            if 'MaterialFaces' in obj.PropertiesList:
-                data = obj.MaterialFaces
-                if not data:
-                    continue
-                mfaces = json.loads(data)
-                bslot = {slot.material.name: i for i, slot in enumerate(bobj.material_slots)}
-                for material, faces in mfaces.items():
-                    if material not in materials:
-                       continue
-                    if material not in bslot:
-                        bslot[material] = len(bobj.material_slots)
-                        bobj.data.materials.append(materials[material])
-                    slot = bslot[material]
-                    for face in faces:
-                        bobj.data.polygons[face].material_index = slot
 
+            if bmesh is not None:
+                # the object shares the mesh of an identical object
+                instances += 1
+                with stats.phase('datablock', obj):
+                    if bobj:
+                        stats.log(f"update object: {obj.Label}")
+                        _setFullDetail(bobj)
+                        _setMesh(bobj, bmesh)
+                    else:
+                        stats.log(f"create new instance: {obj.Label}")
+                        bobj = _getNewObject(bcoll, obj, bmesh)
+                    bobj['ShapeFingerprint'] = key
+                    bobj.pop('FreeCADProxy', None)
 
-    FreeCAD.closeDocument(docname)
+            elif builder is not None:
+                if not builder.hasGeometry():
+                    continue
+                # create or update object with mesh and material data
+                with stats.phase('datablock', obj):
+                    if bobj:
+                        _setFullDetail(bobj)
+                    if bobj and bobj.data.users > 1:
+                        # the mesh is shared with other objects, so we need a new one
+                        stats.log(f"update object: {obj.Label}")
+                        bmesh = bpy.data.meshes.new(name=obj.Label)
+                        registry.addMesh(bmesh, obj.Name)
+                        builder.fill(bmesh)
+                        _setMesh(bobj, bmesh)
+                    elif bobj:
+                        stats.log(f"update object: {obj.Label}")
+                        # update only the mesh of existing object.
+                        bobj.data.clear_geometry()
+                        builder.fill(bobj.data)
+                    else:
+                        # create new object
+                        stats.log(f"create new object: {obj.Label}")
+                        bmesh = bpy.data.meshes.new(name=obj.Label)
+                        registry.addMesh(bmesh, obj.Name)
+                        builder.fill(bmesh)
+                        bobj = _getNewObject(bcoll, obj, bmesh)
+                    if key:
+                        bobj['ShapeFingerprint'] = key
+                    if deferred and _isShape(obj):
+                        # the proxy keeps what is needed to import the shape later
+                        bobj['FreeCADPath'] = path + filename
+                        bobj['FreeCADProxy'] = json.dumps(dict(options, allmaterial=allmaterial))
+                        # the proxy isn't the mesh of the shape, the next incremental import must tessellate it
+                        bobj.pop('ShapeFingerprint', None)
+                    else:
+                        bobj.pop('FreeCADProxy', None)
+                    if instance:
+                        meshes[instance] = bobj.data
+
+            if objplacement:
+                with stats.phase('placement', obj):
+                    fingerprint = _getPlacementFingerprint(objplacement, scale)
+                    if not incremental or bobj.get('PlacementFingerprint') != fingerprint:
+                        _setPlacement(bobj, objplacement, scale)
+                        bobj['PlacementFingerprint'] = fingerprint
+
+            if allmaterial:
+                with stats.phase('material', obj):
+                    fingerprint = _getMaterialFingerprint(source)
+                    if bmesh is not None and builder is None:
+                        # shared meshes already have their materials
+                        bobj['MaterialFingerprint'] = fingerprint
+                    elif not incremental or bobj.get('MaterialFingerprint') != fingerprint:
+                        if incremental:
+                            # materials have changed, so previous materials must be removed
+                            if bobj.data.users > 1:
+                                bobj.data = bobj.data.copy()
+                                registry.addMesh(bobj.data, obj.Name)
+                            _clearMaterials(bobj)
+                        _setMaterials(bobj, source, materials)
+                        bobj['MaterialFingerprint'] = fingerprint
+
+            if lods and builder is not None and _isShape(obj) and not deferred:
+                # lower levels of detail are tessellated with larger deflections
+                with stats.phase('lod', obj):
+                    fcobj = doc.getObject(obj.Name)
+                    lodbuilders = [getShapeMesh(getObjectShape(fcobj), fcobj.Placement if placement else None,
+                                                aspolygons, tessellation * 4 ** level, mergedistance,
+                                                relative * 4 ** level, min(angular * 2 ** level, 90.0), normals)
+                                   for level in range(1, lods + 1)]
+                    _setLODs(bobj.data, lodbuilders, obj, registry)
+
+            data = bobj.data
+            stats.addMesh(obj, len(data.vertices), len(data.polygons), len(data.loops) - 2 * len(data.polygons))
+            stats.sample(queue.pids if queue else ())
+
+        # objects that no longer exist in the FreeCAD document can be removed
+        if removemissing and not newcollection:
+            names = {obj.Name for obj in document.Objects}
+            for bobj in list(bcoll.objects):
+                if bobj.get('Name') not in (None, *names):
+                    stats.log(f"remove object: {bobj.name}")
+                    bmesh = bobj.data
+                    bpy.data.objects.remove(bobj)
+                    if bmesh and bmesh.users == 0:
+                        bpy.data.meshes.remove(bmesh)
+    finally:
+        _closeDocument(zdoc, doc, pool)
+
+    if cache:
+        print(cache.getStatistics())
+        if report:
+            report({'INFO'}, cache.getStatistics())
+    if instancing:
+        print(f"Instancing: {instances} objects share the mesh of an identical object")
+        if report:
+            report({'INFO'}, f"Instancing: {instances} objects share the mesh of an identical object")
+
+    stats.stop()
+    print(stats.getSummary())
+    if report:
+        report({'INFO'}, stats.getSummary())
+    if statsdir:
+        stats.write(os.path.join(statsdir, name + '.json'))
 
     print("Import finished without errors")
     return {'FINISHED'}
 
 
-def _setMaterialNodes(bmat, mat, root):
-    links = {}
-    sockets = {}
-    inputs = {}
-    outputs = {}
-    data = mat.Material.get(root)
-    print(f"_setMaterialNodes() 1 data: {data}")
-    if data:
-        nodes = json.loads(data)
-        for name in nodes:
-            link, socket, input, output = _createNode(bmat, mat, root, name)
-            links.update(link)
-            sockets.update(socket)
-            inputs.update(input)
-            outputs.update(output)
-        for node, link in links.items():
-            bnode = bmat.node_tree.nodes[node]
-            _setLinks(bmat, bnode, link)
-        for node, socket in sockets.items():
-            bnode = bmat.node_tree.nodes[node]
-            _setSockets(bnode, socket)
-        for node, input in inputs.items():
-            bnode = bmat.node_tree.nodes[node]
-            _setInputs(bnode, input)
-        for node, output in outputs.items():
-            bnode = bmat.node_tree.nodes[node]
-            _setOutputs(bnode, output)
-
-def _createNode(bmat, mat, root, name):
-    links = {}
-    sockets = {}
-    inputs = {}
-    outputs = {}
-    data = mat.Material.get(root + '.' + name)
-    if data:
-        node = json.loads(data)
-        print(f"Create Node socket {name} of type {node['Type']}")
-        bnode = bmat.node_tree.nodes.new(type=node['Type'])
+def realizeProxies(bobjs, verbose=False, report=None):
+    # replaces the bounding box mesh of the proxies created by a deferred import with
+    # the tessellated shape, each FreeCAD document is opened only once
+    documents = {}
+    for bobj in bobjs:
+        if 'FreeCADProxy' in bobj and bobj.users_collection:
+            documents.setdefault(bobj['FreeCADPath'], []).append(bobj)
+    if not documents:
+        return 0
+    try:
+        from . import FreeCAD
+    except:
+        print("Unable to import the FreeCAD Python module. Make sure it is installed on your system")
+        print("and compiled with Python3 (same version as Blender).")
+        if report:
+            report({'ERROR'}, 'Unable to import the FreeCAD Python module. Check you have same Python version for FreeCAD and Blender.')
+        return 0
+    count = 0
+    for filepath, proxies in documents.items():
+        filename = os.path.basename(filepath)
+        if not os.path.isfile(filepath):
+            print(f"Unable to find the FreeCAD file: {filepath}")
+            continue
+        stats = ImportStats(filename, verbose)
+        zdoc = zipfile.ZipFile(filepath)
+        doc = None
+        try:
+            with stats.phase('parse'):
+                document = readDocument(zdoc)
+            with stats.phase('open'):
+                doc = FreeCAD.open(filepath)
+            materials = {}
+            for bobj in proxies:
+                obj = document.getObject(bobj['Name'])
+                if obj is None or not _isShape(obj):
+                    print(f"Unable to find the FreeCAD object: {bobj['Name']}")
+                    continue
+                stats.log(f"Realize proxy: {obj.Label}")
+                options = json.loads(bobj['FreeCADProxy'])
+                allmaterial = options.pop('allmaterial')
+                fcobj = doc.getObject(obj.Name)
+                builder = getShapeMesh(getObjectShape(fcobj), fcobj.Placement if options.pop('placement') else None, **options)
+                _addTimings(stats, obj, builder)
+                registry = DatablockRegistry(bobj.users_collection[0], filename)
+                with stats.phase('datablock', obj):
+                    if bobj.data.users > 1:
+                        # the proxy mesh is shared with other objects, so we need a new one
+                        bmesh = bpy.data.meshes.new(name=obj.Label)
+                        registry.addMesh(bmesh, obj.Name)
+                        builder.fill(bmesh)
+                        _setMesh(bobj, bmesh)
+                    else:
+                        bobj.data.clear_geometry()
+                        builder.fill(bobj.data)
+                bmesh = bobj.data
+                if allmaterial:
+                    with stats.phase('material', obj):
+                        source = obj.getLinkedObject(True) if obj.isDerivedFrom('App::Link') else obj
+                        if not materials:
+                            materials = _getRegisteredMaterials(document, registry)
+                        _setMaterials(bobj, source, materials)
+                del bobj['FreeCADProxy']
+                stats.addMesh(obj, len(bmesh.vertices), len(bmesh.polygons), len(bmesh.loops) - 2 * len(bmesh.polygons))
+                stats.sample()
+                count += 1
+        finally:
+            _closeDocument(zdoc, doc, None)
+        stats.stop()
+        print(stats.getSummary())
+        if report:
+            report({'INFO'}, stats.getSummary())
+    return count
+
+def _getRegisteredMaterials(document, registry):
+    # the materials already created by the import of the document, by label
+    materials = {}
+    for obj in document.Objects:
+        if obj.isDerivedFrom('App::MaterialObject'):
+            bmat = registry.getMaterial(_getMaterialHash(obj), obj.Label)
+            if bmat is not None:
+                materials[obj.Label] = bmat
+    return materials
+
+def _closeDocument(zdoc, doc, pool):
+    if pool:
+        pool.close()
+    if doc:
+        from . import FreeCAD
+        FreeCAD.closeDocument(doc.Name)
+    zdoc.close()
+
+def _getMeshData(fcobj):
+    # FreeCAD writes the mesh in its native format (in local coordinates), which is decoded
+    # like the meshes of the zip file: no Python object is created for each point or facet
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'Mesh.bms')
+        fcobj.Mesh.write(filename)
+        with open(filename, 'rb') as f:
+            return f.read()
+
+def _getGuiData(zdoc):
+    # the visibility of the objects by Name, if we have a GUI document
+    if 'GuiDocument.xml' not in zdoc.namelist():
+        return {}
+    handler = XMLHandler()
+    with zdoc.open('GuiDocument.xml') as f:
+        xml.sax.parse(f, handler)
+    return handler.guidata
+
+def _getType(obj):
+    if _isShape(obj):
+        return 'Part'
+    if obj.isDerivedFrom('Mesh::Feature'):
+        return 'Mesh'
+    if obj.isDerivedFrom('App::MaterialObject'):
+        return 'Material'
+    return None
+
+def _getUnselected(document, include, exclude, types, groups):
+    # the Names of the Part and Mesh objects filtered out by glob patterns on their Label or Name,
+    # by their importer type or by glob patterns on the Label or Name of a group containing them.
+    # Materials are only filtered by type, they are used by the objects of any group.
+    def match(objs, patterns):
+        return any(fnmatch.fnmatchcase(name, pattern) for obj in objs
+                   for name in (obj.Name, obj.Label) for pattern in patterns)
+
+    unselected = set()
+    if not (include or exclude or types or groups):
+        return unselected
+    parents = getGroups(document) if groups else {}
+    for obj in document.Objects:
+        kind = _getType(obj)
+        if kind == 'Material' or kind is None:
+            continue
+        if ((types and kind not in types) or (include and not match((obj, ), include)) or
+            (exclude and match((obj, ), exclude)) or (groups and not match(parents[obj.Name] + [obj], groups))):
+            unselected.add(obj.Name)
+    return unselected
+
+def _isShape(obj):
+    # App::Link objects are imported when they link a shape
+    if obj.isDerivedFrom('App::Link'):
+        return obj.getLinkedObject(True).isDerivedFrom('Part::Feature')
+    return obj.isDerivedFrom('Part::Feature')
+
+def _getNewObject(bcoll, obj, bmesh):
+    bobj = bpy.data.objects.new(obj.Label, bmesh)
+    bcoll.objects.link(bobj)
+    # if we want to be able to go back to FreeCAD, we need to keep the Label
+    bobj['Name'] = obj.Name
+    bobj['Label2'] = obj.getPropertyByName('Label2')
+    return bobj
+
+def _addTimings(stats, obj, builder):
+    for phase, elapsed in builder.timings.items():
+        stats.add(phase, elapsed, obj)
+
+def _setLODs(bmesh, builders, obj, registry):
+    # the lower levels of detail are kept with a fake user and each mesh knows all the levels
+    for name in bmesh.get('LODs', ())[1:]:
+        blod = bpy.data.meshes.get(name)
+        if blod is not None and blod is not bmesh:
+            bpy.data.meshes.remove(blod)
+    names = [bmesh.name]
+    for level, builder in enumerate(builders, 1):
+        blod = bpy.data.meshes.new(name=f"{obj.Label}.LOD{level}")
+        registry.addMesh(blod, obj.Name)
+        builder.fill(blod)
+        for bmat in bmesh.materials:
+            blod.materials.append(bmat)
+        blod.use_fake_user = True
+        names.append(blod.name)
+    for name in names:
+        bpy.data.meshes[name]['LODs'] = names
+
+def _setFullDetail(bobj):
+    # a lower level of detail may be swapped in, the full detail mesh is the one to update
+    names = bobj.data.get('LODs')
+    if names and bobj.data.name != names[0]:
+        bmesh = bpy.data.meshes.get(names[0])
+        if bmesh is not None:
+            bmesh.use_fake_user = False
+            bobj.data = bmesh
+
+def _setMesh(bobj, bmesh):
+    old = bobj.data
+    bobj.data = bmesh
+    if old is not bmesh and old.users == 0:
+        bpy.data.meshes.remove(old)
+
+def _getPlacementFingerprint(placement, scale):
+    return repr((placement, scale))
+
+def _getMatrix(placement):
+    # the 4x4 matrix of a (x, y, z, qx, qy, qz, qw) placement
+    x, y, z, qx, qy, qz, qw = placement
+    return ((1 - 2 * (qy * qy + qz * qz), 2 * (qx * qy - qz * qw), 2 * (qx * qz + qy * qw), x),
+            (2 * (qx * qy + qz * qw), 1 - 2 * (qx * qx + qz * qz), 2 * (qy * qz - qx * qw), y),
+            (2 * (qx * qz - qy * qw), 2 * (qy * qz + qx * qw), 1 - 2 * (qx * qx + qy * qy), z),
+            (0, 0, 0, 1))
+
+def _setPlacement(bobj, placement, scale):
+    bobj.location = tuple(v * scale for v in placement[:3])
+    m = bobj.rotation_mode
+    bobj.rotation_mode = 'QUATERNION'
+    if any(placement[3:6]):
+        # FreeCAD Quaternion is XYZW while Blender is WXYZ
+        q = (placement[6], ) + placement[3:6]
+        bobj.rotation_quaternion = (q)
+        bobj.rotation_mode = m
+    bobj.scale = (scale,scale,scale)
+
+def _getMaterialFingerprint(obj):
+    material = None
+    faces = None
+    if 'Material' in obj.PropertiesList and obj.Material:
+        # the content of the material is part of the fingerprint, so an edited material is seen
+        material = (obj.Material.Label, _getMaterialHash(obj.Material))
+    if 'MaterialFaces' in obj.PropertiesList:
+        faces = obj.MaterialFaces
+    return repr((material, faces))
+
+def _clearMaterials(bobj):
+    bobj.data.materials.clear()
+    bobj.data.polygons.foreach_set('material_index', np.zeros(len(bobj.data.polygons), dtype=np.int32))
+
+def _setMaterials(bobj, obj, materials):
+    # material slots are looked up by datablock, identical materials can have another name
+    if 'Material' in obj.PropertiesList:
+        mat = obj.Material
+        # if we have material we need to add only if it doesn't exist
+        if mat and mat.Label in materials:
+            if materials[mat.Label] not in list(bobj.data.materials):
+                bobj.data.materials.append(materials[mat.Label])
+    if 'MaterialFaces' in obj.PropertiesList:
+        data = obj.MaterialFaces
+        if not data:
+            return
+        mfaces = json.loads(data)
+        bslot = {slot.material: i for i, slot in enumerate(bobj.material_slots)}
+        count = len(bobj.data.polygons)
+        indexes = np.zeros(count, dtype=np.int32)
+        bobj.data.polygons.foreach_get('material_index', indexes)
+        for material, faces in mfaces.items():
+            if material not in materials:
+               continue
+            bmat = materials[material]
+            if bmat not in bslot:
+                bslot[bmat] = len(bobj.material_slots)
+                bobj.data.materials.append(bmat)
+            faces = np.asarray(faces, dtype=np.int64)
+            indexes[faces[(faces >= 0) & (faces < count)]] = bslot[bmat]
+        bobj.data.polygons.foreach_set('material_index', indexes)
+
+def _getMaterialHash(mat):
+    data = json.dumps(mat.Material, sort_keys=True)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def _getMaterialNodes(mat, root, key):
+    # the node descriptions are only parsed once for each material content
+    nodes = _nodes.get(key)
+    if nodes is None:
+        nodes = []
+        data = mat.Material.get(root)
+        if data:
+            for name in json.loads(data):
+                data = mat.Material.get(root + '.' + name)
+                if data:
+                    node = json.loads(data)
+                    nodes.append((name, node['Type'], node['Link'], node['Sockets'], node['Inputs'], node['Outputs']))
+        _nodes[key] = nodes
+    return nodes
+
+def _setMaterialNodes(bmat, nodes):
+    bnodes = {}
+    for name, type, link, socket, input, output in nodes:
+        bnode = bmat.node_tree.nodes.new(type=type)
         bnode.name = name
-        links[bnode.name] =   node['Link']
-        sockets[bnode.name] = node['Sockets']
-        inputs[bnode.name] =  node['Inputs']
-        outputs[bnode.name] = node['Outputs']
-    return links, sockets, inputs, outputs
-
-def _setLinks(bmat, bnode, links):
+        bnodes[name] = bnode
+    for name, type, link, socket, input, output in nodes:
+        _setLinks(bmat, bnodes, bnodes[name], link)
+    for name, type, link, socket, input, output in nodes:
+        _setSockets(bnodes[name], socket)
+    for name, type, link, socket, input, output in nodes:
+        _setInputs(bnodes[name], input)
+    for name, type, link, socket, input, output in nodes:
+        _setOutputs(bnodes[name], output)
+
+def _setLinks(bmat, bnodes, bnode, links):
     for input, outputs in links.items():
-        _setLink(bmat, bnode, input, *outputs)
+        _setLink(bmat, bnodes, bnode, input, *outputs)
 
-def _setLink(bmat, bnode, input, node2, output):
-    bmat.node_tree.links.new(bmat.node_tree.nodes[node2].outputs[output],
+def _setLink(bmat, bnodes, bnode, input, node2, output):
+    bmat.node_tree.links.new(bnodes[node2].outputs[output],
                              bnode.inputs[input])
 
 def _setSockets(obj, sockets):
@@ -0,0 +1,222 @@
+#!
+# -*- coding: utf-8 -*-
+
+'''
+╔════════════════════════════════════════════════════════════════════════════════════╗
+║                                                                                    ║
+║   Copyright (c) 2023 https://prrvchr.github.io                                     ║
+║                                                                                    ║
+║   Permission is hereby granted, free of charge, to any person obtaining            ║
+║   a copy of this software and associated documentation files (the "Software"),     ║
+║   to deal in the Software without restriction, including without limitation        ║
+║   the rights to use, copy, modify, merge, publish, distribute, sublicense,         ║
+║   and/or sell copies of the Software, and to permit persons to whom the Software   ║
+║   is furnished to do so, subject to the following conditions:                      ║
+║                                                                                    ║
+║   The above copyright notice and this permission notice shall be included in       ║
+║   all copies or substantial portions of the Software.                              ║
+║                                                                                    ║
+║   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,                  ║
+║   EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES                  ║
+║   OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.        ║
+║   IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY             ║
+║   CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,             ║
+║   TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE       ║
+║   OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                    ║
+║                                                                                    ║
+╚════════════════════════════════════════════════════════════════════════════════════╝
+'''
+
+import numpy as np
+
+from itertools import chain
+import hashlib
+import math
+
+
+class VertexIndex(object):
+    # A vertex welding index used to build Blender mesh vertices.
+    # Each vertex is stored only once: looking up an already known vertex is done
+    # in a dictionary (or in a spatial hash if a merge distance is given)
+    # instead of scanning the whole vertex list.
+
+    def __init__(self, distance=0.0):
+        self.vertices = []
+        self._distance = distance
+        self._index = {}
+
+    def __len__(self):
+        return len(self.vertices)
+
+    # return the index of the given vertex, adding it only if it is not already known
+    def add(self, x, y, z):
+        if self._distance > 0:
+            i = self._find(x, y, z)
+            if i is None:
+                i = self._append(x, y, z)
+            return i
+        key = (x, y, z)
+        i = self._index.get(key)
+        if i is None:
+            i = len(self.vertices)
+            self.vertices.append(key)
+            self._index[key] = i
+        return i
+
+    # always add the given vertex, but later lookups will return the first known index
+    def append(self, x, y, z):
+        if self._distance > 0:
+            return self._append(x, y, z)
+        key = (x, y, z)
+        i = len(self.vertices)
+        self.vertices.append(key)
+        self._index.setdefault(key, i)
+        return i
+
+    def _append(self, x, y, z):
+        i = len(self.vertices)
+        self.vertices.append((x, y, z))
+        self._index.setdefault(self._getCell(x, y, z), []).append(i)
+        return i
+
+    def _find(self, x, y, z):
+        # the cell size is the merge distance, so we only need to look at neighbouring cells
+        cx, cy, cz = self._getCell(x, y, z)
+        distance = self._distance * self._distance
+        found = None
+        for i in range(cx - 1, cx + 2):
+            for j in range(cy - 1, cy + 2):
+                for k in range(cz - 1, cz + 2):
+                    for index in self._index.get((i, j, k), ()):
+                        vx, vy, vz = self.vertices[index]
+                        d = (vx - x) ** 2 + (vy - y) ** 2 + (vz - z) ** 2
+                        if d <= distance and (found is None or index < found):
+                            found = index
+        return found
+
+    def _getCell(self, x, y, z):
+        d = self._distance
+        return math.floor(x / d), math.floor(y / d), math.floor(z / d)
+
+
+class MeshBuilder(object):
+    # Mesh data kept in flat NumPy arrays: vertex coordinates, loop vertex indices,
+    # polygon sizes, loose edges and optional loop normals. The Blender mesh is filled
+    # in bulk with foreach_set() instead of from_pydata(), which needs many small Python
+    # objects. Polygons can be of any size, so triangles and ngons can be mixed.
+
+    def __init__(self, vertices=None, loops=None, sizes=None, edges=None, normals=None):
+        # vertices given in single precision (ie: decoded meshes) are not converted
+        self.vertices = _getArray(vertices, np.float32 if getattr(vertices, 'dtype', None) == np.float32 else np.float64, 3)
+        self.loops = _getArray(loops, np.int32)
+        self.sizes = _getArray(sizes, np.int32)
+        self.edges = _getArray(edges, np.int32, 2)
+        # the custom split normals, one for each loop, if any
+        self.normals = _getArray(normals, np.float32, 3)
+        # the time in seconds spent by the phases building the mesh
+        self.timings = {}
+
+    @classmethod
+    def fromPyData(cls, verts, edges, faces, normals=()):
+        vertices = np.fromiter(chain.from_iterable(verts), dtype=np.float64, count=3 * len(verts))
+        edges = np.fromiter(chain.from_iterable(edges), dtype=np.int32, count=2 * len(edges))
+        sizes = np.fromiter(map(len, faces), dtype=np.int32, count=len(faces))
+        loops = np.fromiter(chain.from_iterable(faces), dtype=np.int32, count=int(sizes.sum()))
+        normals = np.fromiter(chain.from_iterable(normals), dtype=np.float32, count=3 * len(normals))
+        return cls(vertices, loops, sizes, edges, normals)
+
+    @property
+    def starts(self):
+        starts = np.zeros(len(self.sizes), dtype=np.int32)
+        np.cumsum(self.sizes[:-1], out=starts[1:])
+        return starts
+
+    @property
+    def nbytes(self):
+        return self.vertices.nbytes + self.loops.nbytes + self.sizes.nbytes + self.edges.nbytes + self.normals.nbytes
+
+    def getFingerprint(self):
+        fingerprint = hashlib.sha1()
+        for array in (self.vertices, self.loops, self.sizes, self.edges, self.normals):
+            # contiguous arrays are hashed without copying them
+            fingerprint.update(array)
+        return fingerprint.hexdigest()
+
+    def transform(self, matrix):
+        # applies a 4x4 transformation matrix (or its 16 values in row order) to the vertices
+        matrix = np.asarray(matrix, dtype=np.float64).reshape(4, 4)
+        self.vertices = self.vertices @ matrix[:3, :3].T + matrix[:3, 3]
+        if len(self.normals):
+            # placements are rigid transformations, normals only need to be rotated
+            self.normals = (self.normals @ matrix[:3, :3].T).astype(np.float32)
+
+    def removeDegenerates(self):
+        # welding with a merge distance can collapse several loops of a polygon on the same
+        # vertex: the repeated loops are removed and polygons left with less than 3 loops or
+        # still using a vertex twice (ie: [0, 1, 0, 2]) are dropped, as are edges of zero
+        # length, Blender doesn't accept them
+        self.edges = self.edges[self.edges[:, 0] != self.edges[:, 1]]
+        if not len(self.sizes):
+            return
+        starts = self.starts
+        following = np.arange(1, len(self.loops) + 1)
+        following[starts + self.sizes - 1] = starts
+        keep = self.loops != self.loops[following]
+        sizes = np.add.reduceat(keep.astype(np.int32), starts)
+        valid = sizes >= 3
+        # the loops left are sorted by polygon and vertex, a repeated vertex follows itself
+        polygons = np.repeat(np.arange(len(self.sizes)), self.sizes)[keep]
+        order = np.lexsort((self.loops[keep], polygons))
+        polygons = polygons[order]
+        loops = self.loops[keep][order]
+        repeated = (polygons[1:] == polygons[:-1]) & (loops[1:] == loops[:-1])
+        valid[polygons[1:][repeated]] = False
+        keep &= np.repeat(valid, self.sizes)
+        self.loops = self.loops[keep]
+        if len(self.normals):
+            self.normals = self.normals[keep]
+        self.sizes = sizes[valid].astype(np.int32)
+
+    def hasGeometry(self):
+        return len(self.vertices) > 0 and (len(self.sizes) > 0 or len(self.edges) > 0)
+
+    def fill(self, bmesh):
+        import bpy
+        # foreach_set() only takes the fast buffer path if the array types match the RNA types
+        bmesh.vertices.add(len(self.vertices))
+        _setData(bmesh, 'vertices', 'co', 'position', 'vector', self.vertices.astype(np.float32, copy=False).ravel())
+        bmesh.edges.add(len(self.edges))
+        _setData(bmesh, 'edges', 'vertices', '.edge_verts', 'value', self.edges.ravel())
+        bmesh.loops.add(len(self.loops))
+        _setData(bmesh, 'loops', 'vertex_index', '.corner_vert', 'value', self.loops)
+        bmesh.polygons.add(len(self.sizes))
+        bmesh.polygons.foreach_set('loop_start', self.starts)
+        if bpy.app.version < (4, 0, 0):
+            # since Blender 4.0 the polygon size is deduced from the loop starts
+            bmesh.polygons.foreach_set('loop_total', self.sizes)
+        bmesh.update(calc_edges=len(self.sizes) > 0)
+        if len(self.normals) == len(self.loops) and len(self.loops):
+            # custom split normals are only used by smooth shaded polygons
+            bmesh.polygons.foreach_set('use_smooth', np.ones(len(self.sizes), dtype=bool))
+            if bpy.app.version < (4, 1, 0):
+                # since Blender 4.1 custom normals don't need auto smooth anymore
+                bmesh.use_auto_smooth = True
+            bmesh.normals_split_custom_set(self.normals)
+
+
+def _setData(bmesh, collection, name, attribute, key, data):
+    # since Blender 3.6 the mesh data are generic attributes: their foreach_set() copies the whole
+    # buffer at once, while the vertices, edges and loops collections are written item by item
+    battr = bmesh.attributes.get(attribute) if bmesh.attributes is not None else None
+    if battr is not None:
+        battr.data.foreach_set(key, data)
+    elif len(data):
+        getattr(bmesh, collection).foreach_set(name, data)
+
+def _getArray(data, dtype, width=None):
+    if data is None:
+        data = ()
+    array = np.ascontiguousarray(data, dtype=dtype)
+    if width:
+        array = array.reshape(-1, width)
+    return array
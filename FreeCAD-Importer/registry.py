@@ -0,0 +1,104 @@
+#!
+# -*- coding: utf-8 -*-
+
+'''
+╔════════════════════════════════════════════════════════════════════════════════════╗
+║                                                                                    ║
+║   Copyright (c) 2023 https://prrvchr.github.io                                     ║
+║                                                                                    ║
+║   Permission is hereby granted, free of charge, to any person obtaining            ║
+║   a copy of this software and associated documentation files (the "Software"),     ║
+║   to deal in the Software without restriction, including without limitation        ║
+║   the rights to use, copy, modify, merge, publish, distribute, sublicense,         ║
+║   and/or sell copies of the Software, and to permit persons to whom the Software   ║
+║   is furnished to do so, subject to the following conditions:                      ║
+║                                                                                    ║
+║   The above copyright notice and this permission notice shall be included in       ║
+║   all copies or substantial portions of the Software.                              ║
+║                                                                                    ║
+║   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,                  ║
+║   EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES                  ║
+║   OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.        ║
+║   IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY             ║
+║   CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,             ║
+║   TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE       ║
+║   OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                    ║
+║                                                                                    ║
+╚════════════════════════════════════════════════════════════════════════════════════╝
+'''
+
+
+import bpy
+
+
+class DatablockRegistry(object):
+    # The meshes and materials created by the imports of a FreeCAD document.
+    # Each datablock is tagged with the source file and the FreeCAD object Name, and
+    # the registry is kept in the collection of the document (so it is saved with the
+    # blend file). Cleaning and looking up datablocks only touches this set instead of
+    # scanning all the meshes and materials of the blend file.
+
+    def __init__(self, bcoll, filename):
+        self._bcoll = bcoll
+        self._filename = filename
+
+    def addMesh(self, bmesh, name):
+        self._tag(bmesh, name)
+        self._getGroup('FreeCADMeshes')[bmesh.name] = name
+
+    def addMaterial(self, bmat, name, key):
+        # materials can be shared by several documents, they keep the tags of their first one
+        if 'FreeCADFile' not in bmat:
+            self._tag(bmat, name)
+        materials = self._getGroup('FreeCADMaterials')
+        # the material may have been rebuilt, it is no longer found by its previous content
+        for stale in [k for k, v in materials.items() if v == bmat.name and k != key]:
+            del materials[stale]
+        materials[key] = bmat.name
+
+    def getMaterial(self, key, label):
+        # the material created by a previous import of the document, or a material having the same content
+        name = self._getGroup('FreeCADMaterials').get(key, label)
+        bmat = bpy.data.materials.get(name)
+        if bmat is None and name != label:
+            bmat = bpy.data.materials.get(label)
+        if bmat is not None and bmat.name == label and 'MaterialHash' not in bmat:
+            # a material imported by a version of the importer that didn't hash them is reused
+            bmat['MaterialHash'] = key
+        if bmat is not None and bmat.get('MaterialHash') == key:
+            return bmat
+        return None
+
+    def getEditedMaterial(self, name, keys):
+        # the material created by a previous import for the FreeCAD material Name, if its content has
+        # changed and no other material of the document still has this content (ie: it can be rebuilt)
+        for bname in self._getGroup('FreeCADMaterials').values():
+            bmat = bpy.data.materials.get(bname)
+            if (bmat is not None and bmat.get('FreeCADFile') == self._filename and bmat.get('Name') == name and
+                    bmat.get('MaterialHash') not in keys):
+                return bmat
+        return None
+
+    def removeOrphanMeshes(self):
+        # only the meshes created by this document without any user are removed
+        meshes = self._getGroup('FreeCADMeshes')
+        i = 0
+        for name in list(meshes.keys()):
+            bmesh = bpy.data.meshes.get(name)
+            if bmesh is None or bmesh.get('FreeCADFile') != self._filename:
+                # the mesh has been removed or renamed outside of the importer
+                del meshes[name]
+            elif bmesh.users == 0:
+                del meshes[name]
+                bpy.data.meshes.remove(bmesh)
+                i += 1
+        return i
+
+    def _tag(self, datablock, name):
+        datablock['FreeCADFile'] = self._filename
+        datablock['Name'] = name
+
+    def _getGroup(self, key):
+        if key not in self._bcoll:
+            self._bcoll[key] = {}
+        return self._bcoll[key]
@@ -0,0 +1,265 @@
+#!
+# -*- coding: utf-8 -*-
+
+'''
+╔════════════════════════════════════════════════════════════════════════════════════╗
+║                                                                                    ║
+║   Copyright (c) 2018 Yorik van Havre                                               ║
+║   Copyright (c) 2023 https://prrvchr.github.io                                     ║
+║                                                                                    ║
+║   Permission is hereby granted, free of charge, to any person obtaining            ║
+║   a copy of this software and associated documentation files (the "Software"),     ║
+║   to deal in the Software without restriction, including without limitation        ║
+║   the rights to use, copy, modify, merge, publish, distribute, sublicense,         ║
+║   and/or sell copies of the Software, and to permit persons to whom the Software   ║
+║   is furnished to do so, subject to the following conditions:                      ║
+║                                                                                    ║
+║   The above copyright notice and this permission notice shall be included in       ║
+║   all copies or substantial portions of the Software.                              ║
+║                                                                                    ║
+║   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,                  ║
+║   EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES                  ║
+║   OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.        ║
+║   IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY             ║
+║   CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,             ║
+║   TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE       ║
+║   OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                    ║
+║                                                                                    ║
+╚════════════════════════════════════════════════════════════════════════════════════╝
+'''
+
+# This module must not import bpy, it is also used by the FreeCAD worker processes
+
+import numpy as np
+
+from time import perf_counter
+import hashlib
+import json
+import math
+
+from .mesh import VertexIndex
+from .mesh import MeshBuilder
+
+
+def getObjectShape(obj):
+    # an App::Link gets the shape of the linked object moved to the link placement
+    if obj.isDerivedFrom('App::Link'):
+        linked = obj.getLinkedObject(True)
+        shape = linked.Shape
+        shape.Placement = obj.Placement.multiply(linked.Placement.inverse().multiply(shape.Placement))
+        return shape
+    return obj.Shape
+
+def getShapeFingerprint(shape, placement=None, options=None):
+    # a stable fingerprint of the shape geometry and of the options used to tessellate it. The BREP
+    # of a copy is hashed, a copy has no triangulation while recent OCC versions write the one the
+    # shape gets once tessellated. Only the topology is copied, the geometry is shared with the shape.
+    # If a placement is given the fingerprint is in local coordinates.
+    shape = shape.copy(False, False)
+    if placement:
+        shape.Placement = placement.inverse().multiply(shape.Placement)
+    fingerprint = hashlib.sha1(shape.exportBrepToString().encode('utf-8'))
+    fingerprint.update(json.dumps(options, sort_keys=True).encode('utf-8'))
+    return fingerprint.hexdigest()
+
+def getShapeMesh(shape, placement=None, aspolygons=True, tessellation=1.0, mergedistance=0.0,
+                 relative=0.0, angular=0.0, normals=False):
+    # create mesh from shape, FreeCAD must already be imported. If a relative deflection is
+    # given, the linear deflection is this percentage of the shape bounding box diagonal,
+    # otherwise it is the tessellation value. The angular deflection is in degrees. With
+    # normals, the surface normal of the B-rep face is sampled at each loop of the mesh.
+    import Part
+
+    def hascurves(edges):
+        for e in edges:
+            if not isinstance(e.Curve, (Part.Line, Part.LineSegment)):
+                return True
+        return False
+
+    start = perf_counter()
+    welding = 0.0
+    vindex = VertexIndex(mergedistance)
+    edges = []
+    faces = []
+    loopnormals = []
+    faceedges = set() # a placeholder to store edges that belong to a face
+    polygons = [] # the index in faces of the planar polygons, their points and their face normal
+    deflection = getDeflection(shape, tessellation, relative, placement)
+    if shape.Faces:
+        if aspolygons or normals:
+            # write FreeCAD faces as polygons when possible
+            for face in shape.Faces:
+                fedges = face.Edges
+                faceedges.update(e.hashCode() for e in fedges)
+                if not aspolygons or (len(face.Wires) > 1) or (not isinstance(face.Surface,Part.Plane)) or hascurves(fedges):
+                    # face has holes or is curved, so we need to triangulate it
+                    rawdata = _tessellate(face, deflection, angular)
+                    t = perf_counter()
+                    indexes = [vindex.add(v.x,v.y,v.z) for v in rawdata[0]]
+                    welding += perf_counter() - t
+                    for f in rawdata[1]:
+                        faces.append([indexes[vi] for vi in f])
+                    if normals:
+                        # the loops of each face have their own normals, so face boundaries stay sharp
+                        loopnormals.extend(_getFaceNormals(face, rawdata[0], rawdata[1], rawdata[2]))
+                else:
+                    points = [v.Point for v in face.OuterWire.OrderedVertexes]
+                    t = perf_counter()
+                    f = [vindex.add(p.x,p.y,p.z) for p in points]
+                    welding += perf_counter() - t
+                    # FreeCAD doesn't care about verts order, the winding of all polygons is checked at once
+                    n = face.normalAt(0,0)
+                    polygons.append((len(faces), points, (n.x, n.y, n.z)))
+                    faces.append(f)
+                    if normals:
+                        loopnormals.extend([(n.x, n.y, n.z)] * len(f))
+            for i in _getReversedPolygons(polygons):
+                faces[i].reverse() # inverting verts order if the direction is couterclockwise
+        else:
+            # triangulate and make faces
+            rawdata = _tessellate(shape, deflection, angular)
+            t = perf_counter()
+            if mergedistance:
+                indexes = [vindex.add(v.x,v.y,v.z) for v in rawdata[0]]
+                for f in rawdata[1]:
+                    faces.append([indexes[vi] for vi in f])
+            else:
+                for v in rawdata[0]:
+                    vindex.append(v.x,v.y,v.z)
+                for f in rawdata[1]:
+                    faces.append(f)
+            welding += perf_counter() - t
+            for face in shape.Faces:
+                faceedges.update(e.hashCode() for e in face.Edges)
+        # the triangulation is not left on the shape of the document once the buffers are read
+        shape.clean()
+
+    for edge in shape.Edges:
+        # Treat remaining edges (that are not in faces)
+        if not (edge.hashCode() in faceedges):
+            if hascurves((edge, )):
+                # curved edges are discretized with the same deflection as faces
+                dv = edge.discretize(Deflection=deflection)
+                indexes = [vindex.add(v.x,v.y,v.z) for v in dv]
+                for i in range(len(indexes)-1):
+                    edges.append([indexes[i],indexes[i+1]])
+            else:
+                # TODO discretize non-linear edges
+                edges.append([vindex.add(v.X,v.Y,v.Z) for v in edge.Vertexes])
+    builder = MeshBuilder.fromPyData(vindex.vertices, edges, faces, loopnormals)
+    if mergedistance:
+        builder.removeDegenerates()
+    if placement:
+        # the shape is tessellated in place and the mesh is moved to local coordinates,
+        # this is much cheaper than tessellating a moved copy of the shape
+        builder.transform(placement.inverse().toMatrix().A)
+    builder.timings = {'tessellation': perf_counter() - start - welding, 'welding': welding}
+    return builder
+
+def getShapeProxy(shape, placement=None):
+    # a box mesh of the shape bounding box, used as a lightweight proxy until the shape is
+    # tessellated. With a placement the box is in local coordinates, like the shape mesh.
+    if placement:
+        location = shape.Placement
+        shape.Placement = placement.inverse().multiply(location)
+        box = shape.BoundBox
+        shape.Placement = location
+    else:
+        box = shape.BoundBox
+    if not box.isValid():
+        return MeshBuilder()
+    # the vertex i is at the minimum or the maximum of each axis, given by the bits of i
+    vertices = [((box.XMin, box.XMax)[i & 1], (box.YMin, box.YMax)[i >> 1 & 1], (box.ZMin, box.ZMax)[i >> 2 & 1])
+                for i in range(8)]
+    faces = ((0, 2, 3, 1), (4, 5, 7, 6), (0, 1, 5, 4), (2, 6, 7, 3), (0, 4, 6, 2), (1, 3, 7, 5))
+    return MeshBuilder.fromPyData(vertices, [], faces)
+
+def getDeflection(shape, tessellation=1.0, relative=0.0, placement=None):
+    # the linear deflection, which can be relative to the size of the shape. With a
+    # placement the size is measured in local coordinates, only the shape location is
+    # changed for that, so the deflection does not depend on the shape orientation.
+    if relative:
+        if placement:
+            location = shape.Placement
+            shape.Placement = placement.inverse().multiply(location)
+            diagonal = shape.BoundBox.DiagonalLength
+            shape.Placement = location
+        else:
+            diagonal = shape.BoundBox.DiagonalLength
+        return max(diagonal * relative / 100, 1e-6)
+    return tessellation
+
+def _getReversedPolygons(polygons):
+    # the index of the polygons going in the opposite direction of their face normal. The normal
+    # of each polygon is given by Newell's method, for all polygons in one vectorized pass.
+    if not polygons:
+        return []
+    sizes = np.fromiter((len(points) for i, points, n in polygons), dtype=np.int64, count=len(polygons))
+    points = np.array([(p.x, p.y, p.z) for i, points, n in polygons for p in points], dtype=np.float64)
+    starts = np.zeros(len(sizes), dtype=np.int64)
+    np.cumsum(sizes[:-1], out=starts[1:])
+    # points are moved near the origin for the precision, the next point of the last one is the first one
+    points -= np.repeat(points[starts], sizes, axis=0)
+    following = np.arange(1, len(points) + 1)
+    following[starts + sizes - 1] = starts
+    newell = np.add.reduceat(np.cross(points, points[following]), starts)
+    normals = np.array([n for i, points, n in polygons], dtype=np.float64)
+    opposite = np.einsum('ij,ij->i', newell, normals) < 0
+    return [polygons[k][0] for k in np.flatnonzero(opposite)]
+
+def _getFaceNormals(face, points, triangles, nodes):
+    # the normals of the face at the loops of the tessellated triangles. If the points are the nodes
+    # of the face triangulation their (u, v) parameters are the UV nodes with the same index, the
+    # points meshed by MeshPart are reordered and their parameters are found on the surface, which
+    # is much slower. The surface has no normal at singular points (ie: the pole of a sphere or the
+    # apex of a cone), the loops at these points get the normal of their triangle.
+    uvs = face.getUVNodes() if nodes and hasattr(face, 'getUVNodes') else ()
+    if len(uvs) != len(points):
+        uvs = None
+        surface = face.Surface
+    normals = []
+    for i, p in enumerate(points):
+        try:
+            u, v = uvs[i] if uvs is not None else surface.parameter(p)
+            n = face.normalAt(u, v)
+        except Exception:
+            n = None
+        normals.append((n.x, n.y, n.z) if n is not None and n.Length > 0 else None)
+    loopnormals = []
+    for triangle in triangles:
+        fallback = None
+        for i in triangle:
+            n = normals[i]
+            if n is None:
+                if fallback is None:
+                    fallback = _getTriangleNormal(*(points[j] for j in triangle))
+                n = fallback
+            loopnormals.append(n)
+    return loopnormals
+
+def _getTriangleNormal(a, b, c):
+    n = b.sub(a).cross(c.sub(a))
+    length = n.Length
+    if not length:
+        return (0.0, 0.0, 1.0)
+    return (n.x / length, n.y / length, n.z / length)
+
+def _tessellate(shape, deflection, angular):
+    # returns the points and the triangles of the mesh, and whether the points are the nodes of the
+    # shape triangulation in the same order. The angular deflection needs the MeshPart module,
+    # tessellate() only has a linear deflection. An existing triangulation is reused by OCC if it
+    # is finer, so the shape is always cleaned first: the deflection is the one asked for and each
+    # level of detail gets its own mesh.
+    if angular:
+        try:
+            import MeshPart
+        except ImportError:
+            pass
+        else:
+            shape.clean()
+            mesh = MeshPart.meshFromShape(Shape=shape, LinearDeflection=deflection,
+                                          AngularDeflection=math.radians(angular), Relative=False)
+            points, triangles = mesh.Topology
+            return points, triangles, False
+    points, triangles = shape.tessellate(deflection, True)
+    return points, triangles, True
@@ -0,0 +1,154 @@
+#!
+# -*- coding: utf-8 -*-
+
+'''
+╔════════════════════════════════════════════════════════════════════════════════════╗
+║                                                                                    ║
+║   Copyright (c) 2023 https://prrvchr.github.io                                     ║
+║                                                                                    ║
+║   Permission is hereby granted, free of charge, to any person obtaining            ║
+║   a copy of this software and associated documentation files (the "Software"),     ║
+║   to deal in the Software without restriction, including without limitation        ║
+║   the rights to use, copy, modify, merge, publish, distribute, sublicense,         ║
+║   and/or sell copies of the Software, and to permit persons to whom the Software   ║
+║   is furnished to do so, subject to the following conditions:                      ║
+║                                                                                    ║
+║   The above copyright notice and this permission notice shall be included in       ║
+║   all copies or substantial portions of the Software.                              ║
+║                                                                                    ║
+║   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,                  ║
+║   EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES                  ║
+║   OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.        ║
+║   IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY             ║
+║   CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,             ║
+║   TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE       ║
+║   OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                    ║
+║                                                                                    ║
+╚════════════════════════════════════════════════════════════════════════════════════╝
+'''
+
+
+# This module must not import bpy, it is also used by the batch import
+
+from contextlib import contextmanager
+from time import perf_counter
+import json
+import sys
+import os
+
+
+def getMemory(pids=()):
+    # the resident memory in MB of the process and of the given processes (ie: the FreeCAD
+    # workers), the peak resident memory of the process if it is unknown
+    try:
+        memory = _getResidentMemory('self')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return getPeakMemory()
+    for pid in pids:
+        try:
+            memory += _getResidentMemory(pid)
+        except (OSError, ValueError, IndexError):
+            # the process has exited
+            pass
+    return memory
+
+def getPeakMemory():
+    # the peak resident memory of the process since it started in MB, 0 if it is unknown (ie: on Windows)
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # the peak is in bytes on macOS and in kB on Linux
+    return peak / 1048576 if sys.platform == 'darwin' else peak / 1024
+
+
+class ImportStats(object):
+    # Records the wall time of each import phase, for the whole document and
+    # for each object, and the vertex and face counts of the created meshes.
+    # The peak memory is the largest sample taken during the import, with the
+    # FreeCAD workers. Per object messages are only printed in verbose mode.
+
+    phases = ('parse', 'open', 'fingerprint', 'cache', 'tessellation', 'welding',
+              'proxy', 'mesh', 'datablock', 'placement', 'material', 'lod')
+
+    def __init__(self, filename='', verbose=False):
+        self.filename = filename
+        self.verbose = verbose
+        self.mode = ''
+        self.elapsed = 0.0
+        self.memory = 0.0
+        self._phases = dict.fromkeys(self.phases, 0.0)
+        self._objects = {}
+        self._start = perf_counter()
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    @contextmanager
+    def phase(self, name, obj=None):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start, obj)
+
+    def add(self, name, elapsed, obj=None):
+        self._phases[name] = self._phases.get(name, 0.0) + elapsed
+        if obj is not None:
+            phases = self._getObject(obj)['phases']
+            phases[name] = phases.get(name, 0.0) + elapsed
+
+    def addMesh(self, obj, vertices, faces, triangles=0):
+        data = self._getObject(obj)
+        data['vertices'] = vertices
+        data['faces'] = faces
+        data['triangles'] = triangles
+
+    def sample(self, pids=()):
+        # returns the resident memory of the process and of the given workers, keeping its peak
+        memory = getMemory(pids)
+        self.memory = max(self.memory, memory)
+        return memory
+
+    def stop(self):
+        self.elapsed = perf_counter() - self._start
+        self.sample()
+
+    def getReport(self):
+        objects = self._objects.values()
+        return {'file': self.filename,
+                'mode': self.mode,
+                'time': self.elapsed,
+                'memory': self.memory,
+                'objects': len(self._objects),
+                'vertices': sum(data['vertices'] for data in objects),
+                'faces': sum(data['faces'] for data in objects),
+                'triangles': sum(data['triangles'] for data in objects),
+                'phases': dict(self._phases),
+                'details': dict(self._objects)}
+
+    def getSummary(self):
+        report = self.getReport()
+        phases = ', '.join(f"{name} {elapsed:.2f}s" for name, elapsed in report['phases'].items() if elapsed)
+        mode = f"{report['mode']} tessellation: " if report['mode'] else ''
+        memory = f", peak memory {report['memory']:.0f} MB" if report['memory'] else ''
+        return (f"{mode}{report['objects']} objects, {report['vertices']} vertices, {report['faces']} faces, "
+                f"{report['triangles']} triangles imported in {report['time']:.2f}s ({phases}){memory}")
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.getReport(), f, indent=2)
+
+    def _getObject(self, obj):
+        data = self._objects.get(obj.Name)
+        if data is None:
+            data = self._objects[obj.Name] = {'label': obj.Label, 'vertices': 0, 'faces': 0,
+                                              'triangles': 0, 'phases': {}}
+        return data
+
+
+def _getResidentMemory(pid):
+    with open(f'/proc/{pid}/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1048576
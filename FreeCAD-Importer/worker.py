@@ -0,0 +1,319 @@
+#!
+# -*- coding: utf-8 -*-
+
+'''
+╔════════════════════════════════════════════════════════════════════════════════════╗
+║                                                                                    ║
+║   Copyright (c) 2023 https://prrvchr.github.io                                     ║
+║                                                                                    ║
+║   Permission is hereby granted, free of charge, to any person obtaining            ║
+║   a copy of this software and associated documentation files (the "Software"),     ║
+║   to deal in the Software without restriction, including without limitation        ║
+║   the rights to use, copy, modify, merge, publish, distribute, sublicense,         ║
+║   and/or sell copies of the Software, and to permit persons to whom the Software   ║
+║   is furnished to do so, subject to the following conditions:                      ║
+║                                                                                    ║
+║   The above copyright notice and this permission notice shall be included in       ║
+║   all copies or substantial portions of the Software.                              ║
+║                                                                                    ║
+║   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,                  ║
+║   EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES                  ║
+║   OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.        ║
+║   IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY             ║
+║   CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,             ║
+║   TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE       ║
+║   OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                    ║
+║                                                                                    ║
+╚════════════════════════════════════════════════════════════════════════════════════╝
+'''
+
+# This module must not import bpy: it drives the FreeCAD worker processes from Blender
+# and it is also the script run by these worker processes.
+
+from concurrent.futures import Future
+from collections import OrderedDict
+from collections import deque
+import numpy as np
+import subprocess
+import threading
+import importlib
+import atexit
+import types
+import json
+import sys
+import os
+
+
+# the pool kept running between imports
+_pool = None
+
+def getWorkerPool(count):
+    # returns a pool whose workers keep the recently used FreeCAD documents open,
+    # so the next imports of these documents don't have to load them again
+    global _pool
+    if _pool is not None and _pool.count != count:
+        _pool.close()
+        _pool = None
+    if _pool is None:
+        _pool = WorkerPool(count)
+    return _pool
+
+@atexit.register
+def closeWorkerPool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+class WorkerPool(object):
+    # A pool of headless FreeCAD processes used to tessellate shapes in parallel.
+    # Workers receive object names and send back the flat mesh buffers of each object.
+    # A worker that has exited (ie: FreeCAD crashed) is replaced on the next request.
+
+    def __init__(self, count):
+        self.count = count
+        self._workers = [Worker() for i in range(count)]
+        self._next = 0
+
+    # returns a dictionary of futures (one for each object name) resolved to MeshBuilder
+    def submit(self, path, names, **options):
+        return self._submit('mesh', path, names, options)
+
+    # returns a dictionary of futures (one for each object name) resolved to shape fingerprints
+    def fingerprint(self, path, names, **options):
+        return self._submit('fingerprint', path, names, options)
+
+    @property
+    def pids(self):
+        return [worker.pid for worker in self._workers if worker.isAlive()]
+
+    def close(self):
+        for worker in self._workers:
+            worker.close()
+
+    def _submit(self, command, path, names, options):
+        futures = {}
+        for i, worker in enumerate(self._workers):
+            if not worker.isAlive():
+                worker.close()
+                self._workers[i] = Worker()
+        for i in range(self.count):
+            # objects are dealt out in turn, so results come back in document order
+            chunk = names[i::self.count]
+            if chunk:
+                worker = self._workers[(self._next + i) % self.count]
+                futures.update(worker.submit(command, path, chunk, options))
+        self._next = (self._next + len(names)) % self.count
+        return futures
+
+
+class WorkerQueue(object):
+    # Submits the objects to a worker pool in document order, with at most limit objects
+    # in flight: the mesh buffers waiting to be imported take a bounded amount of memory.
+    # Objects must be popped in document order, the ones skipped before are discarded.
+
+    def __init__(self, pool, path, names, options, limit):
+        self.limit = limit
+        self._pool = pool
+        self._path = path
+        self._options = options
+        self._names = deque(names)
+        self._waiting = set(names)
+        self._futures = OrderedDict()
+        self._fill()
+
+    def __contains__(self, name):
+        return name in self._waiting
+
+    @property
+    def pids(self):
+        return self._pool.pids
+
+    def pop(self, name):
+        if name not in self._futures:
+            count = list(self._names).index(name) + 1
+            self._submit(count)
+        while True:
+            first, future = self._futures.popitem(last=False)
+            self._waiting.discard(first)
+            if first == name:
+                break
+        self._fill()
+        return future
+
+    def _fill(self):
+        self._submit(self.limit - len(self._futures))
+
+    def _submit(self, count):
+        names = [self._names.popleft() for i in range(min(count, len(self._names)))]
+        if names:
+            futures = self._pool.submit(self._path, names, **self._options)
+            self._futures.update((name, futures[name]) for name in names)
+
+
+class Worker(object):
+    # A FreeCAD process reading requests on its stdin and writing mesh buffers on its stdout
+
+    def __init__(self):
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._process = subprocess.Popen([sys.executable, os.path.abspath(__file__)],
+                                         stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE)
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    @property
+    def pid(self):
+        return self._process.pid
+
+    def isAlive(self):
+        return self._process.poll() is None
+
+    def submit(self, command, path, names, options):
+        futures = {name: Future() for name in names}
+        request = {'command': command, 'path': path, 'names': names, 'options': options}
+        with self._lock:
+            self._pending.extend(futures.values())
+            try:
+                self._process.stdin.write(json.dumps(request).encode('utf-8') + b'\n')
+                self._process.stdin.flush()
+            except OSError as e:
+                self._cancel(e)
+        return futures
+
+    def close(self):
+        try:
+            self._process.stdin.close()
+            self._process.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+        self._thread.join()
+
+    def _read(self):
+        # a reply that can't be read (ie: the worker crashed in the middle of it) cancels all
+        # the pending requests, the worker is killed so the pool replaces it on the next request
+        stream = self._process.stdout
+        try:
+            while True:
+                line = stream.readline()
+                if not line:
+                    break
+                header = json.loads(line)
+                builder = None
+                if 'error' not in header and 'fingerprint' not in header:
+                    builder = readMesh(stream, header)
+                with self._lock:
+                    future = self._pending.popleft()
+                if 'error' in header:
+                    future.set_exception(RuntimeError(header['error']))
+                elif 'fingerprint' in header:
+                    future.set_result(header['fingerprint'])
+                else:
+                    future.set_result(builder)
+        except Exception as e:
+            self._process.kill()
+            error = RuntimeError(f"Unable to read the FreeCAD worker reply: {e!r}")
+        else:
+            error = RuntimeError('FreeCAD worker exited with code %s' % self._process.poll())
+        with self._lock:
+            self._cancel(error)
+
+    def _cancel(self, error):
+        while self._pending:
+            self._pending.popleft().set_exception(error)
+
+
+# the mesh buffers are sent as a JSON header line followed by the raw arrays
+def writeMesh(stream, builder):
+    arrays = _getArrays(builder)
+    header = {name: len(array) for name, array in arrays}
+    header['timings'] = builder.timings
+    stream.write(json.dumps(header).encode('utf-8') + b'\n')
+    for name, array in arrays:
+        stream.write(array.tobytes())
+
+def readMesh(stream, header):
+    from .mesh import MeshBuilder
+    builder = MeshBuilder()
+    for name, array in _getArrays(builder):
+        size = header[name] * array.itemsize * (array.shape[1] if array.ndim > 1 else 1)
+        data = stream.read(size)
+        if len(data) != size:
+            raise EOFError(f"truncated {name}: {len(data)} of {size} bytes")
+        data = np.frombuffer(bytearray(data), dtype=array.dtype)
+        setattr(builder, name, data.reshape((-1, ) + array.shape[1:]))
+    builder.timings = header.get('timings', {})
+    return builder
+
+def _getArrays(builder):
+    return [(name, getattr(builder, name)) for name in ('vertices', 'loops', 'sizes', 'edges', 'normals')]
+
+
+def _getModules():
+    # load the modules of the add-on without running its __init__.py which needs bpy
+    path = os.path.dirname(os.path.abspath(__file__))
+    name = os.path.basename(path)
+    package = types.ModuleType(name)
+    package.__path__ = [path]
+    sys.modules[name] = package
+    FreeCAD = importlib.import_module(name + '.FreeCAD')
+    shape = importlib.import_module(name + '.shape')
+    return FreeCAD, shape
+
+def _getDocument(FreeCAD, documents, path, count=4):
+    # the documents stay open until their file changes or they are the least recently used
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    if path in documents:
+        doc, previous = documents.pop(path)
+        if previous == stamp:
+            documents[path] = doc, stamp
+            return doc
+        FreeCAD.closeDocument(doc.Name)
+    while len(documents) >= count:
+        doc, previous = documents.pop(next(iter(documents)))
+        FreeCAD.closeDocument(doc.Name)
+    doc = FreeCAD.open(path)
+    documents[path] = doc, stamp
+    return doc
+
+def main():
+    # FreeCAD writes its messages on stdout, so we keep the original stdout for the mesh buffers
+    output = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    FreeCAD, shape = _getModules()
+    documents = OrderedDict()
+    for line in sys.stdin.buffer:
+        request = json.loads(line)
+        options = request['options']
+        try:
+            doc = _getDocument(FreeCAD, documents, request['path'])
+        except Exception as e:
+            doc = None
+            error = e
+        for name in request['names']:
+            try:
+                if doc is None:
+                    raise error
+                obj = doc.getObject(name)
+                placement = obj.Placement if options['placement'] else None
+                if request['command'] == 'fingerprint':
+                    header = {'fingerprint': shape.getShapeFingerprint(shape.getObjectShape(obj), placement, options)}
+                    builder = None
+                else:
+                    builder = shape.getShapeMesh(shape.getObjectShape(obj), placement,
+                                                 **{k: v for k, v in options.items() if k != 'placement'})
+            except Exception as e:
+                header = {'error': f"{name}: {e}"}
+                builder = None
+            if builder is None:
+                output.write(json.dumps(header).encode('utf-8') + b'\n')
+            else:
+                writeMesh(output, builder)
+            output.flush()
+
+
+if __name__ == '__main__':
+    main()
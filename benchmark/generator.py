@@ -0,0 +1,154 @@
+#!
+# -*- coding: utf-8 -*-
+
+'''
+╔════════════════════════════════════════════════════════════════════════════════════╗
+║                                                                                    ║
+║   Copyright (c) 2023 https://prrvchr.github.io                                     ║
+║                                                                                    ║
+║   Permission is hereby granted, free of charge, to any person obtaining            ║
+║   a copy of this software and associated documentation files (the "Software"),     ║
+║   to deal in the Software without restriction, including without limitation        ║
+║   the rights to use, copy, modify, merge, publish, distribute, sublicense,         ║
+║   and/or sell copies of the Software, and to permit persons to whom the Software   ║
+║   is furnished to do so, subject to the following conditions:                      ║
+║                                                                                    ║
+║   The above copyright notice and this permission notice shall be included in       ║
+║   all copies or substantial portions of the Software.                              ║
+║                                                                                    ║
+║   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,                  ║
+║   EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES                  ║
+║   OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.        ║
+║   IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY             ║
+║   CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,             ║
+║   TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE       ║
+║   OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                    ║
+║                                                                                    ║
+╚════════════════════════════════════════════════════════════════════════════════════╝
+'''
+
+
+# Writes synthetic FCStd documents: a real Document.xml, GuiDocument.xml and binary
+# mesh files, and the Synthetic.json entry needed by the stub FreeCAD module.
+
+from xml.sax.saxutils import quoteattr
+import zipfile
+import json
+import math
+
+from stubfreecad import getMeshGrid
+from stubfreecad import getMeshData
+
+
+def getMaterial(name, color=(0.8, 0.2, 0.2, 1.0)):
+    # a material object with the node descriptions of a Principled BSDF
+    nodes = {'Blender': json.dumps(['Principled BSDF', 'Material Output']),
+             'Blender.Principled BSDF': json.dumps({'Type': 'ShaderNodeBsdfPrincipled', 'Link': {},
+                                                    'Sockets': {'location': [10.0, 300.0]},
+                                                    'Inputs': {'Base Color': list(color), 'Roughness': 0.5},
+                                                    'Outputs': {}}),
+             'Blender.Material Output': json.dumps({'Type': 'ShaderNodeOutputMaterial',
+                                                    'Link': {'Surface': ['Principled BSDF', 'BSDF']},
+                                                    'Sockets': {}, 'Inputs': {}, 'Outputs': {}})}
+    return {'name': name, 'type': 'App::MaterialObjectPython', 'nodes': nodes}
+
+def getDocument(nparts=10, faces=20, curved=0, lines=0, arcs=0, meshes=0, triangles=2000, materials=2,
+                hidden=0, materialfaces=True, duplicates=0, holes=False, links=0):
+    # returns the object specifications of a document: nparts Part::Feature of faces
+    # planar faces (curved of them are cylinders) with loose lines and arcs, Mesh::Feature
+    # of triangles, materials with MaterialFaces, hidden objects, identical shapes,
+    # App::Link and a group holding half of the objects
+    specs = []
+    for i in range(materials):
+        specs.append(getMaterial(f"Material{i:03d}", (0.1 * i % 1, 0.5, 0.5, 1.0)))
+    for i in range(nparts):
+        shape = {'kind': 'cylinder' if i < curved else 'grid', 'faces': faces, 'lines': lines, 'arcs': arcs,
+                 'seed': i, 'holes': holes, 'size': 10.0 + (0 if i < duplicates else i)}
+        angle = 0.3 * i
+        spec = {'name': f"Part{i:04d}", 'label': f"Part {i}", 'type': 'Part::Feature', 'shape': shape,
+                'label2': f"description {i}",
+                'placement': [100.0 * i, 10.0 * i, 0.0, 0.0, 0.0, math.sin(angle / 2), math.cos(angle / 2)]}
+        if materials:
+            spec['material'] = f"Material{i % materials:03d}"
+            if materialfaces and materials > 1:
+                spec['materialfaces'] = json.dumps({f"Material{(i + 1) % materials:03d}": list(range(0, faces, 3))})
+        specs.append(spec)
+    for i in range(meshes):
+        specs.append({'name': f"Mesh{i:04d}", 'label': f"Mesh {i}", 'type': 'Mesh::Feature',
+                      'mesh': {'triangles': triangles}, 'placement': [0.0, 50.0 * i, 0.0, 0.0, 0.0, 0.0, 1.0]})
+    for i in range(links):
+        specs.append({'name': f"Link{i:04d}", 'label': f"Link {i}", 'type': 'App::Link', 'link': 'Part0000',
+                      'placement': [0.0, -100.0 * (i + 1), 0.0, 0.0, 0.0, 0.0, 1.0]})
+    names = [spec['name'] for spec in specs if spec['type'] != 'App::MaterialObjectPython']
+    specs.append({'name': 'Group', 'label': 'Roof', 'type': 'App::DocumentObjectGroup', 'group': names[:len(names) // 2]})
+    for spec in specs[materials:materials + hidden]:
+        spec['hidden'] = True
+    return specs
+
+def writeDocument(path, specs):
+    # writes the FCStd file of the object specifications and returns its path
+    objects = []
+    data = []
+    gui = []
+    files = {}
+    for spec in specs:
+        objects.append(f'<Object type="{spec["type"]}" name="{spec["name"]}" id="{len(objects) + 1}"/>')
+        properties = _getProperties(spec, files)
+        data.append(f'<Object name="{spec["name"]}"><Properties Count="{len(properties)}" TransientCount="0">'
+                    f'{"".join(properties)}</Properties></Object>')
+        visibility = 'false' if spec.get('hidden') else 'true'
+        gui.append(f'<ViewProvider name="{spec["name"]}" expanded="0"><Properties Count="1" TransientCount="0">'
+                   f'<Property name="Visibility" type="App::PropertyBool"><Bool value="{visibility}"/></Property>'
+                   '</Properties></ViewProvider>')
+    document = ('<?xml version=\'1.0\' encoding=\'utf-8\'?>\n'
+                '<Document SchemaVersion="4" ProgramVersion="0.20R" FileVersion="1">'
+                '<Properties Count="1" TransientCount="0"><Property name="Label" type="App::PropertyString">'
+                '<String value="Synthetic"/></Property></Properties>'
+                f'<Objects Count="{len(objects)}" Dependencies="1">{"".join(objects)}</Objects>'
+                f'<ObjectData Count="{len(data)}">{"".join(data)}</ObjectData></Document>')
+    guidocument = ('<?xml version=\'1.0\' encoding=\'utf-8\'?>\n<Document SchemaVersion="1">'
+                   f'<ViewProviderData Count="{len(gui)}">{"".join(gui)}</ViewProviderData></Document>')
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zdoc:
+        zdoc.writestr('Document.xml', document)
+        zdoc.writestr('GuiDocument.xml', guidocument)
+        zdoc.writestr('Synthetic.json', json.dumps(specs))
+        for filename, content in files.items():
+            zdoc.writestr(filename, content)
+    return path
+
+def _getProperties(spec, files):
+    # the XML of the object properties, the shape and mesh files are added to files
+    properties = [_getProperty('Label', 'App::PropertyString', f'<String value={quoteattr(spec.get("label", spec["name"]))}/>'),
+                  _getProperty('Label2', 'App::PropertyString', f'<String value={quoteattr(spec.get("label2", ""))}/>')]
+    if 'placement' in spec:
+        px, py, pz, q0, q1, q2, q3 = spec['placement']
+        properties.append(_getProperty('Placement', 'App::PropertyPlacement',
+                                       f'<PropertyPlacement Px="{px!r}" Py="{py!r}" Pz="{pz!r}" Q0="{q0!r}" Q1="{q1!r}" '
+                                       f'Q2="{q2!r}" Q3="{q3!r}" A="0" Ox="0" Oy="0" Oz="1"/>'))
+    if spec['type'] == 'Part::Feature':
+        filename = f"PartShape{len(files)}.brp" if files else 'PartShape.brp'
+        files[filename] = json.dumps(spec['shape']).encode()
+        properties.append(_getProperty('Shape', 'Part::PropertyPartShape', f'<Part file="{filename}"/>'))
+    if spec['type'] == 'Mesh::Feature':
+        filename = f"MeshKernel{len(files)}.bms"
+        files[filename] = getMeshData(*getMeshGrid(spec['mesh']))
+        properties.append(_getProperty('Mesh', 'Mesh::PropertyMeshKernel', f'<Mesh file="{filename}"/>'))
+    if 'material' in spec:
+        properties.append(_getProperty('Material', 'App::PropertyLink', f'<Link value="{spec["material"]}"/>'))
+    if 'materialfaces' in spec:
+        properties.append(_getProperty('MaterialFaces', 'App::PropertyString',
+                                       f'<String value={quoteattr(spec["materialfaces"])}/>'))
+    if 'nodes' in spec:
+        items = ''.join(f'<Item key={quoteattr(k)} value={quoteattr(v)}/>' for k, v in spec['nodes'].items())
+        properties.append(_getProperty('Material', 'App::PropertyMap', f'<Map count="{len(spec["nodes"])}">{items}</Map>'))
+    if 'group' in spec:
+        links = ''.join(f'<Link value="{name}"/>' for name in spec['group'])
+        properties.append(_getProperty('Group', 'App::PropertyLinkList',
+                                       f'<LinkList count="{len(spec["group"])}">{links}</LinkList>'))
+    if 'link' in spec:
+        properties.append(_getProperty('LinkedObject', 'App::PropertyXLink',
+                                       f'<XLink file="" stamp="" name="{spec["link"]}"/>'))
+    return properties
+
+def _getProperty(name, type, body):
+    return f'<Property name="{name}" type="{type}">{body}</Property>'
@@ -0,0 +1,240 @@
+#!
+# -*- coding: utf-8 -*-
+
+'''
+╔════════════════════════════════════════════════════════════════════════════════════╗
+║                                                                                    ║
+║   Copyright (c) 2023 https://prrvchr.github.io                                     ║
+║                                                                                    ║
+║   Permission is hereby granted, free of charge, to any person obtaining            ║
+║   a copy of this software and associated documentation files (the "Software"),     ║
+║   to deal in the Software without restriction, including without limitation        ║
+║   the rights to use, copy, modify, merge, publish, distribute, sublicense,         ║
+║   and/or sell copies of the Software, and to permit persons to whom the Software   ║
+║   is furnished to do so, subject to the following conditions:                      ║
+║                                                                                    ║
+║   The above copyright notice and this permission notice shall be included in       ║
+║   all copies or substantial portions of the Software.                              ║
+║                                                                                    ║
+║   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,                  ║
+║   EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES                  ║
+║   OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.        ║
+║   IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY             ║
+║   CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,             ║
+║   TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE       ║
+║   OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                    ║
+║                                                                                    ║
+╚════════════════════════════════════════════════════════════════════════════════════╝
+'''
+
+
+# Benchmarks the importer without Blender nor FreeCAD, using stub modules:
+#
+#   python benchmark/run.py [--sizes 10,100,500] [--save] [--tolerance 0.5]
+#
+# Synthetic documents of growing sizes are imported and the time of each import
+# phase is measured. With --save the timings are kept as the baseline, otherwise
+# the run fails if a phase is slower than the baseline by more than the tolerance.
+# Timings depend on the machine, the baseline must be saved before making changes.
+# The meshes of the smallest documents are first checked against the reference
+# implementations, the run fails if they aren't identical.
+
+from argparse import ArgumentParser
+import importlib.util
+import tempfile
+import io
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stubbpy
+import stubfreecad
+import generator
+
+
+ADDON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'FreeCAD-Importer')
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+class ListIndex(object):
+    # The vertex welding of the original importer, used as the reference: the vertex
+    # list is scanned for each vertex and the first identical vertex is used.
+
+    def __init__(self, distance=0.0):
+        self.vertices = []
+
+    def __len__(self):
+        return len(self.vertices)
+
+    def add(self, x, y, z):
+        key = (x, y, z)
+        if key not in self.vertices:
+            self.vertices.append(key)
+        return self.vertices.index(key)
+
+    def append(self, x, y, z):
+        self.vertices.append((x, y, z))
+        return len(self.vertices) - 1
+
+
+def getCases(sizes):
+    # each size gives documents of Part shapes with a quarter of curved shapes, loose
+    # edges, materials and MaterialFaces and hidden objects, tessellated in absolute
+    # and adaptive modes, coarser with smooth normals or as deferred proxies, of meshes
+    # and of links, with the import options to use
+    cases = {}
+    for size in sizes:
+        cases[f"parts-{size}"] = (generator.getDocument(nparts=size, faces=24, curved=size // 4, lines=2, arcs=1,
+                                                        materials=4, hidden=size // 10, duplicates=size // 10), {})
+        cases[f"adaptive-{size}"] = (cases[f"parts-{size}"][0], {'relative': 0.1, 'angular': 28.5})
+        cases[f"normals-{size}"] = (cases[f"parts-{size}"][0], {'normals': True, 'tessellation': 4.0})
+        cases[f"deferred-{size}"] = (cases[f"parts-{size}"][0], {'deferred': True})
+        cases[f"meshes-{size}"] = (generator.getDocument(nparts=0, meshes=max(1, size // 10), triangles=20000,
+                                                         materials=0), {})
+        cases[f"links-{size}"] = (generator.getDocument(nparts=max(1, size // 10), faces=24, links=size),
+                                  {'instancing': True})
+    return cases
+
+def loadHelper(path=ADDON):
+    # the add-on is loaded as a package, its FreeCAD module is replaced by the stub
+    bpy = stubbpy.install()
+    name = 'addon'
+    stubfreecad.install(name)
+    spec = importlib.util.spec_from_file_location(name, os.path.join(path, '__init__.py'),
+                                                  submodule_search_locations=[path])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return bpy, importlib.import_module(name + '.helper')
+
+def runCase(bpy, helper, path, repeat, **options):
+    # returns the best time of each phase over several imports in an empty Blender file
+    best = None
+    for i in range(repeat):
+        bpy.data.reset()
+        bpy.context.scene.collection.children._items = []
+        stats = helper.ImportStats(os.path.basename(path))
+        helper.importFCStd(os.path.dirname(path) + os.sep, os.path.basename(path), stats=stats, **options)
+        report = stats.getReport()
+        timings = dict(report['phases'], total=report['time'])
+        if best is None:
+            best = timings
+        else:
+            best = {phase: min(best[phase], timings[phase]) for phase in best}
+    return best, report
+
+def checkMeshes(cases):
+    # returns the shapes of the documents whose mesh isn't identical to the mesh of the references
+    shape = importlib.import_module('addon.shape')
+    worker = importlib.import_module('addon.worker')
+    keys = ('aspolygons', 'tessellation', 'relative', 'angular', 'normals')
+    mismatches = []
+    for case, (specs, options) in cases.items():
+        document = stubfreecad.Document('', specs, case)
+        options = {key: value for key, value in options.items() if key in keys}
+        for obj in document.Objects:
+            if obj.TypeId != 'Part::Feature':
+                continue
+            builder = shape.getShapeMesh(shape.getObjectShape(obj), obj.Placement, **options)
+            # without merge distance, the welding must give the same topology as the list scan
+            index = shape.VertexIndex
+            shape.VertexIndex = ListIndex
+            try:
+                reference = shape.getShapeMesh(shape.getObjectShape(obj), obj.Placement, **options)
+            finally:
+                shape.VertexIndex = index
+            if not _isSameMesh(builder, reference):
+                mismatches.append((case, obj.Label, 'welding'))
+            # the mesh built by a worker, with the options it gets in JSON, must come back unchanged
+            stream = io.BytesIO()
+            worker.writeMesh(stream, shape.getShapeMesh(shape.getObjectShape(obj), obj.Placement,
+                                                        **json.loads(json.dumps(options))))
+            stream.seek(0)
+            if not _isSameMesh(worker.readMesh(stream, json.loads(stream.readline())), builder):
+                mismatches.append((case, obj.Label, 'worker'))
+    return mismatches
+
+def compare(results, baseline, tolerance, minimum):
+    # returns the phases that are slower than the baseline
+    regressions = []
+    for case, timings in results.items():
+        for phase, elapsed in timings.items():
+            reference = baseline.get(case, {}).get(phase)
+            if reference is not None and elapsed > max(reference * (1 + tolerance), reference + minimum):
+                regressions.append((case, phase, reference, elapsed))
+    return regressions
+
+def main(argv=None):
+    parser = ArgumentParser(description='Benchmarks the FreeCAD importer with stub bpy and FreeCAD modules')
+    parser.add_argument('--sizes', default='10,100,500',
+                        help='Comma separated object counts of the synthetic documents')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='The best time of this number of imports is kept')
+    parser.add_argument('--baseline', default=BASELINE,
+                        help='The JSON file holding the reference timings')
+    parser.add_argument('--save', action='store_true',
+                        help='Save the timings as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Allowed relative slowdown of a phase before failing')
+    parser.add_argument('--minimum', type=float, default=0.05,
+                        help='Slowdowns smaller than this number of seconds are ignored')
+    parser.add_argument('--output', default='',
+                        help='Save the timings and statistics of each case in this JSON file')
+    args = parser.parse_args(argv)
+
+    bpy, helper = loadHelper()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    mismatches = checkMeshes(getCases([min(sizes)]))
+    for case, label, check in mismatches:
+        print(f"MISMATCH {case} {label}: the {check} mesh isn't identical to the reference")
+    if mismatches:
+        return 1
+    # per object messages are not printed and the import summary goes to a null stream
+    results = {}
+    reports = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for case, (specs, options) in getCases(sizes).items():
+            path = generator.writeDocument(os.path.join(tmp, case + '.FCStd'), specs)
+            stdout = sys.stdout
+            sys.stdout = open(os.devnull, 'w')
+            try:
+                results[case], reports[case] = runCase(bpy, helper, path, args.repeat, **options)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            phases = ', '.join(f"{phase} {elapsed:.3f}s" for phase, elapsed in results[case].items() if elapsed)
+            print(f"{case:<14} {reports[case]['objects']:>6} objects {reports[case]['triangles']:>8} triangles: {phases}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline saved in {args.baseline}")
+        return 0
+    if not os.path.isfile(args.baseline):
+        print(f"No baseline found, run with --save before making changes to create {args.baseline}")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.minimum)
+    for case, phase, reference, elapsed in regressions:
+        print(f"REGRESSION {case} {phase}: {elapsed:.3f}s instead of {reference:.3f}s")
+    if not regressions:
+        print("No regression")
+    return 1 if regressions else 0
+
+def _isSameMesh(builder, reference):
+    # the arrays must be identical, bit for bit and with the same types
+    for name in ('vertices', 'loops', 'sizes', 'edges', 'normals'):
+        array, other = getattr(builder, name), getattr(reference, name)
+        if array.dtype != other.dtype or array.shape != other.shape or array.tobytes() != other.tobytes():
+            return False
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,552 @@
+#!
+# -*- coding: utf-8 -*-
+
+'''
+╔════════════════════════════════════════════════════════════════════════════════════╗
+║                                                                                    ║
+║   Copyright (c) 2023 https://prrvchr.github.io                                     ║
+║                                                                                    ║
+║   Permission is hereby granted, free of charge, to any person obtaining            ║
+║   a copy of this software and associated documentation files (the "Software"),     ║
+║   to deal in the Software without restriction, including without limitation        ║
+║   the rights to use, copy, modify, merge, publish, distribute, sublicense,         ║
+║   and/or sell copies of the Software, and to permit persons to whom the Software   ║
+║   is furnished to do so, subject to the following conditions:                      ║
+║                                                                                    ║
+║   The above copyright notice and this permission notice shall be included in       ║
+║   all copies or substantial portions of the Software.                              ║
+║                                                                                    ║
+║   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,                  ║
+║   EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES                  ║
+║   OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.        ║
+║   IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY             ║
+║   CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,             ║
+║   TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE       ║
+║   OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                    ║
+║                                                                                    ║
+╚════════════════════════════════════════════════════════════════════════════════════╝
+'''
+
+
+# A minimal stand-in for the bpy module, only the parts used by the importer are
+# implemented. Mesh data is kept in Python lists so results can be compared.
+
+import numpy as np
+
+import types
+import sys
+
+
+class Element(object):
+    # An item of a mesh data collection, its attributes are read and written in the collection
+
+    def __init__(self, collection, index):
+        object.__setattr__(self, '_collection', collection)
+        object.__setattr__(self, '_index', index)
+
+    def __getattr__(self, name):
+        return self._collection._getValues(name)[self._index]
+
+    def __setattr__(self, name, value):
+        self._collection._getValues(name)[self._index] = value
+
+
+class MeshCollection(object):
+    # The vertices, edges, loops or polygons of a mesh. The spec gives the count of
+    # values of each attribute and its default value.
+
+    def __init__(self, spec):
+        self._spec = spec
+        self._values = {name: [] for name in spec}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if i < 0 or i >= self._count:
+            raise IndexError(i)
+        return Element(self, i)
+
+    def __iter__(self):
+        return (Element(self, i) for i in range(self._count))
+
+    def add(self, count):
+        count = int(count)
+        for name, (size, default) in self._spec.items():
+            self._values[name].extend([default] * count)
+        self._count += count
+
+    def foreach_set(self, name, values):
+        size, default = self._spec[name]
+        values = values.ravel().tolist() if hasattr(values, 'ravel') else list(values)
+        if name in ('co', 'normal'):
+            # like Blender, coordinates are stored in single precision
+            values = np.asarray(values, dtype=np.float32).astype(float).tolist()
+        assert len(values) == size * self._count, (name, len(values), size, self._count)
+        if size == 1:
+            self._values[name] = values
+        else:
+            self._values[name] = [tuple(values[i * size:(i + 1) * size]) for i in range(self._count)]
+
+    def foreach_get(self, name, values):
+        size, default = self._spec[name]
+        flat = []
+        for value in self._values[name]:
+            if size == 1:
+                flat.append(value)
+            else:
+                flat.extend(value)
+        if hasattr(values, 'ravel'):
+            values[:] = np.asarray(flat, dtype=values.dtype).reshape(values.shape)
+        else:
+            values[:] = flat
+
+    def clear(self):
+        self._values = {name: [] for name in self._spec}
+        self._count = 0
+
+    def _getValues(self, name):
+        return self._values[name]
+
+
+class IDProperties(object):
+    # The custom properties of a datablock
+
+    def __init__(self):
+        self._properties = {}
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __setitem__(self, key, value):
+        self._properties[key] = value
+
+    def __delitem__(self, key):
+        del self._properties[key]
+
+    def __contains__(self, key):
+        return key in self._properties
+
+    def get(self, key, default=None):
+        return self._properties.get(key, default)
+
+    def keys(self):
+        return self._properties.keys()
+
+    def pop(self, key, *default):
+        return self._properties.pop(key, *default)
+
+
+class IDCollection(object):
+    # A bpy.data collection, new datablocks get a unique name like in Blender (ie: Name.001)
+
+    def __init__(self, factory):
+        self._items = []
+        self._factory = factory
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __getitem__(self, name):
+        item = self.get(name)
+        if item is None:
+            raise KeyError(name)
+        return item
+
+    def new(self, name, *args, **kwargs):
+        item = self._factory(self._getUniqueName(name), *args, **kwargs)
+        self._items.append(item)
+        return item
+
+    def get(self, name, default=None):
+        for item in self._items:
+            if item.name == name:
+                return item
+        return default
+
+    def remove(self, item, **kwargs):
+        self._items.remove(item)
+
+    def _getUniqueName(self, name):
+        names = {item.name for item in self._items}
+        if name not in names:
+            return name
+        i = 1
+        while f"{name}.{i:03d}" in names:
+            i += 1
+        return f"{name}.{i:03d}"
+
+
+class MaterialList(list):
+    # The materials of a mesh
+
+    def get(self, name, default=None):
+        for bmat in self:
+            if bmat is not None and bmat.name == name:
+                return bmat
+        return default
+
+
+class Mesh(IDProperties):
+    # A mesh datablock, without generic attributes like before Blender 3.5
+
+    def __init__(self, name):
+        IDProperties.__init__(self)
+        self.name = name
+        self.use_fake_user = False
+        self.use_auto_smooth = False
+        self.custom_normals = None
+        self.materials = MaterialList()
+        self._setGeometry()
+
+    @property
+    def users(self):
+        return sum(1 for bobj in data.objects if bobj.data is self) + (1 if self.use_fake_user else 0)
+
+    def from_pydata(self, verts, edges, faces, shade_flat=True):
+        self.vertices.add(len(verts))
+        self.vertices.foreach_set('co', [c for v in verts for c in v])
+        self.edges.add(len(edges))
+        self.edges.foreach_set('vertices', [i for e in edges for i in e])
+        self.loops.add(sum(len(f) for f in faces))
+        self.loops.foreach_set('vertex_index', [i for f in faces for i in f])
+        self.polygons.add(len(faces))
+        starts = []
+        start = 0
+        for f in faces:
+            starts.append(start)
+            start += len(f)
+        self.polygons.foreach_set('loop_start', starts)
+        self.polygons.foreach_set('loop_total', [len(f) for f in faces])
+
+    def clear_geometry(self):
+        self._setGeometry()
+
+    def update(self, calc_edges=False, calc_edges_loose=False):
+        pass
+
+    def validate(self, **kwargs):
+        return False
+
+    def normals_split_custom_set(self, normals):
+        self.custom_normals = [tuple(n) for n in normals]
+
+    def transform(self, matrix):
+        pass
+
+    # returns the mesh data as lists, used to compare results
+    def pydata(self):
+        verts = list(self.vertices._values['co'])
+        edges = [tuple(e) for e in self.edges._values['vertices']]
+        loops = self.loops._values['vertex_index']
+        faces = [tuple(loops[start:start + total]) for start, total in zip(self.polygons._values['loop_start'],
+                                                                            self.polygons._values['loop_total'])]
+        return verts, edges, faces
+
+    def _setGeometry(self):
+        self.vertices = MeshCollection({'co': (3, (0.0, 0.0, 0.0))})
+        self.edges = MeshCollection({'vertices': (2, (0, 0)), 'use_edge_sharp': (1, False)})
+        self.loops = MeshCollection({'vertex_index': (1, 0), 'edge_index': (1, 0)})
+        self.polygons = MeshCollection({'loop_start': (1, 0), 'loop_total': (1, 0),
+                                        'material_index': (1, 0), 'use_smooth': (1, False)})
+        self.attributes = None
+
+
+class MaterialSlot(object):
+
+    def __init__(self, bmat):
+        self.material = bmat
+
+
+class Object(IDProperties):
+
+    def __init__(self, name, bdata=None):
+        IDProperties.__init__(self)
+        self.name = name
+        self.data = bdata
+        self.location = (0, 0, 0)
+        self.rotation_mode = 'XYZ'
+        self.rotation_quaternion = (1, 0, 0, 0)
+        self.scale = (1, 1, 1)
+        self.hide_viewport = False
+        self.users_collection = []
+        self.select = False
+
+    @property
+    def material_slots(self):
+        return [MaterialSlot(bmat) for bmat in self.data.materials]
+
+    def select_get(self):
+        return self.select
+
+    def visible_get(self):
+        return not self.hide_viewport
+
+
+class CollectionObjects(object):
+    # The objects linked to a collection
+
+    def __init__(self, bcoll):
+        self._items = []
+        self._bcoll = bcoll
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def link(self, bobj):
+        self._items.append(bobj)
+        bobj.users_collection.append(self._bcoll)
+
+    def unlink(self, bobj):
+        self._items.remove(bobj)
+        bobj.users_collection.remove(self._bcoll)
+
+    def get(self, name, default=None):
+        for bobj in self._items:
+            if bobj.name == name:
+                return bobj
+        return default
+
+
+class CollectionChildren(object):
+
+    def __init__(self):
+        self._items = []
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def link(self, bcoll):
+        self._items.append(bcoll)
+
+
+class Collection(IDProperties):
+
+    def __init__(self, name):
+        IDProperties.__init__(self)
+        self.name = name
+        self.objects = CollectionObjects(self)
+        self.children = CollectionChildren()
+
+
+class NodeSocket(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.default_value = None
+
+
+class NodeSockets(dict):
+    # The sockets of a node are created when they are first looked up
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def get(self, name, default=None):
+        return self.setdefault(name, NodeSocket(name))
+
+
+class Node(object):
+
+    def __init__(self, type):
+        self.type = type
+        self.name = type
+        self.location = (0, 0)
+        self.inputs = NodeSockets()
+        self.outputs = NodeSockets()
+
+
+class Nodes(object):
+
+    def __init__(self):
+        self._items = []
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, name):
+        node = self.get(name)
+        if node is None:
+            raise KeyError(name)
+        return node
+
+    def new(self, type):
+        node = Node(type)
+        self._items.append(node)
+        return node
+
+    def get(self, name, default=None):
+        for node in self._items:
+            if node.name == name:
+                return node
+        return default
+
+    def clear(self):
+        self._items = []
+
+
+class NodeLinks(object):
+
+    def __init__(self):
+        self._items = []
+
+    def __len__(self):
+        return len(self._items)
+
+    def new(self, output, input):
+        self._items.append((output, input))
+
+
+class NodeTree(object):
+
+    def __init__(self):
+        self.nodes = Nodes()
+        self.links = NodeLinks()
+
+
+class Material(IDProperties):
+
+    def __init__(self, name):
+        IDProperties.__init__(self)
+        self.name = name
+        self.use_nodes = False
+        self.use_fake_user = False
+        self.node_tree = NodeTree()
+
+    @property
+    def users(self):
+        return sum(1 for bmesh in data.meshes for bmat in bmesh.materials if bmat is self)
+
+
+class BlendData(object):
+    # The bpy.data of an empty Blender file
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.meshes = IDCollection(Mesh)
+        self.objects = IDCollection(Object)
+        self.collections = IDCollection(Collection)
+        self.materials = IDCollection(Material)
+
+    def batch_remove(self, ids):
+        for datablock in list(ids):
+            for collection in (self.meshes, self.objects, self.collections, self.materials):
+                if datablock in collection._items:
+                    collection.remove(datablock)
+
+
+class Scene(object):
+
+    def __init__(self):
+        self.collection = Collection('Scene Collection')
+
+
+class Context(object):
+    # A background Blender context, without window manager
+
+    def __init__(self):
+        self.scene = Scene()
+        self.preferences = None
+        self.window_manager = None
+        self.selected_objects = []
+        self.visible_objects = []
+
+
+class WindowManagerOperators(object):
+
+    def read_homefile(self, **kwargs):
+        data.reset()
+
+    def save_as_mainfile(self, filepath='', **kwargs):
+        with open(filepath, 'w') as f:
+            f.write('blend')
+
+
+class Menu(object):
+
+    @staticmethod
+    def append(function):
+        pass
+
+    @staticmethod
+    def remove(function):
+        pass
+
+
+# the base classes of the add-on classes
+class Operator(object):
+    pass
+
+class AddonPreferences(object):
+    pass
+
+class Panel(object):
+    pass
+
+class PropertyPanel(object):
+    pass
+
+class ImportHelper(object):
+    pass
+
+class OperatorFileListElement(object):
+    pass
+
+
+data = BlendData()
+context = Context()
+app = types.SimpleNamespace(version=(3, 6, 0), background=True, binary_path='/usr/bin/blender')
+
+
+def install():
+    # the bpy, rna_prop_ui and bpy_extras modules are replaced
+    props = types.SimpleNamespace(**{name: _getProperty for name in ('StringProperty', 'BoolProperty', 'FloatProperty',
+                                                                     'IntProperty', 'EnumProperty', 'CollectionProperty',
+                                                                     'PointerProperty')})
+    btypes = types.SimpleNamespace(Operator=Operator, AddonPreferences=AddonPreferences, Panel=Panel,
+                                   OperatorFileListElement=OperatorFileListElement, Collection=Collection,
+                                   PropertyGroup=OperatorFileListElement, TOPBAR_MT_file_import=Menu,
+                                   VIEW3D_MT_object=Menu)
+    utils = types.SimpleNamespace(register_class=_register, unregister_class=_register)
+    bpy = types.ModuleType('bpy')
+    bpy.data = data
+    bpy.context = context
+    bpy.app = app
+    bpy.props = props
+    bpy.types = btypes
+    bpy.utils = utils
+    bpy.ops = types.SimpleNamespace(wm=WindowManagerOperators())
+    sys.modules['bpy'] = bpy
+    sys.modules['bpy.props'] = props
+    sys.modules['bpy.types'] = btypes
+    sys.modules['bpy.utils'] = utils
+    rna = types.ModuleType('rna_prop_ui')
+    rna.PropertyPanel = PropertyPanel
+    sys.modules['rna_prop_ui'] = rna
+    extras = types.ModuleType('bpy_extras')
+    extras.io_utils = types.ModuleType('bpy_extras.io_utils')
+    extras.io_utils.ImportHelper = ImportHelper
+    sys.modules['bpy_extras'] = extras
+    sys.modules['bpy_extras.io_utils'] = extras.io_utils
+    return bpy
+
+def _getProperty(*args, **kwargs):
+    return None
+
+def _register(cls):
+    pass
@@ -0,0 +1,670 @@
+#!
+# -*- coding: utf-8 -*-
+
+'''
+╔════════════════════════════════════════════════════════════════════════════════════╗
+║                                                                                    ║
+║   Copyright (c) 2023 https://prrvchr.github.io                                     ║
+║                                                                                    ║
+║   Permission is hereby granted, free of charge, to any person obtaining            ║
+║   a copy of this software and associated documentation files (the "Software"),     ║
+║   to deal in the Software without restriction, including without limitation        ║
+║   the rights to use, copy, modify, merge, publish, distribute, sublicense,         ║
+║   and/or sell copies of the Software, and to permit persons to whom the Software   ║
+║   is furnished to do so, subject to the following conditions:                      ║
+║                                                                                    ║
+║   The above copyright notice and this permission notice shall be included in       ║
+║   all copies or substantial portions of the Software.                              ║
+║                                                                                    ║
+║   THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,                  ║
+║   EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES                  ║
+║   OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.        ║
+║   IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY             ║
+║   CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,             ║
+║   TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE       ║
+║   OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                    ║
+║                                                                                    ║
+╚════════════════════════════════════════════════════════════════════════════════════╝
+'''
+
+
+# A minimal stand-in for the FreeCAD, Part and Mesh modules used by the importer.
+# Shapes and meshes are rebuilt from the Synthetic.json entry written in the FCStd
+# files by the generator module.
+
+import zipfile
+import struct
+import types
+import json
+import math
+import sys
+import io
+
+
+class Vector(object):
+    # A FreeCAD.Vector with the methods used by the importer and the stubs
+
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    @property
+    def Length(self):
+        return math.sqrt(self.dot(self))
+
+    def sub(self, other):
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def add(self, other):
+        return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def cross(self, other):
+        return Vector(self.y * other.z - self.z * other.y,
+                      self.z * other.x - self.x * other.z,
+                      self.x * other.y - self.y * other.x)
+
+    def dot(self, other):
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    # like FreeCAD, the vector is scaled in place
+    def multiply(self, scale):
+        self.x *= scale
+        self.y *= scale
+        self.z *= scale
+        return self
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __getitem__(self, i):
+        return (self.x, self.y, self.z)[i]
+
+    def __repr__(self):
+        return f"Vector({self.x!r}, {self.y!r}, {self.z!r})"
+
+
+class Matrix(object):
+    # A FreeCAD.Matrix, only its 16 values in row order
+
+    def __init__(self, values):
+        self.A = tuple(values)
+
+
+class Rotation(object):
+    # A FreeCAD.Rotation given by its (x, y, z, w) quaternion
+
+    def __init__(self, q=(0.0, 0.0, 0.0, 1.0)):
+        x, y, z, w = q
+        n = math.sqrt(x * x + y * y + z * z + w * w)
+        self.Q = (x / n, y / n, z / n, w / n)
+
+    def multVec(self, v):
+        x, y, z, w = self.Q
+        # v + 2w(u x v) + 2u x (u x v), u being the vector part of the quaternion
+        tx = 2 * (y * v.z - z * v.y)
+        ty = 2 * (z * v.x - x * v.z)
+        tz = 2 * (x * v.y - y * v.x)
+        return Vector(v.x + w * tx + (y * tz - z * ty),
+                      v.y + w * ty + (z * tx - x * tz),
+                      v.z + w * tz + (x * ty - y * tx))
+
+    def inverted(self):
+        x, y, z, w = self.Q
+        return Rotation((-x, -y, -z, w))
+
+    def multiply(self, other):
+        x1, y1, z1, w1 = self.Q
+        x2, y2, z2, w2 = other.Q
+        return Rotation((w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+                         w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+                         w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+                         w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2))
+
+
+class Placement(object):
+    # A FreeCAD.Placement: a rotation followed by a translation
+
+    def __init__(self, base=None, rotation=None):
+        self._base = base or Vector()
+        self.Rotation = rotation or Rotation()
+
+    @property
+    def Base(self):
+        return Vector(self._base.x, self._base.y, self._base.z)
+
+    def multVec(self, v):
+        return self.Rotation.multVec(v).add(self._base)
+
+    def inverse(self):
+        rotation = self.Rotation.inverted()
+        base = rotation.multVec(self._base)
+        return Placement(Vector(-base.x, -base.y, -base.z), rotation)
+
+    def multiply(self, other):
+        return Placement(self.multVec(other._base), self.Rotation.multiply(other.Rotation))
+
+    def toMatrix(self):
+        x, y, z, w = self.Rotation.Q
+        b = self._base
+        return Matrix((1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w), b.x,
+                       2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w), b.y,
+                       2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y), b.z,
+                       0.0, 0.0, 0.0, 1.0))
+
+    def copy(self):
+        return Placement(self.Base, Rotation(self.Rotation.Q))
+
+
+# the Part curves and surfaces are only used as types
+class Line(object):
+    pass
+
+class LineSegment(Line):
+    pass
+
+class Circle(object):
+    pass
+
+class Plane(object):
+    pass
+
+class Cylinder(object):
+    pass
+
+
+class BoundBox(object):
+    # The bounding box of a list of points, an empty list gives an invalid box
+
+    def __init__(self, points):
+        xs = [p.x for p in points] or [0]
+        ys = [p.y for p in points] or [0]
+        zs = [p.z for p in points] or [0]
+        self.XMin, self.XMax = min(xs), max(xs)
+        self.YMin, self.YMax = min(ys), max(ys)
+        self.ZMin, self.ZMax = min(zs), max(zs)
+        self.XLength = self.XMax - self.XMin
+        self.YLength = self.YMax - self.YMin
+        self.ZLength = self.ZMax - self.ZMin
+        self.DiagonalLength = math.sqrt(self.XLength ** 2 + self.YLength ** 2 + self.ZLength ** 2)
+        self._valid = bool(points)
+
+    def isValid(self):
+        return self._valid
+
+
+class Vertex(object):
+
+    def __init__(self, point):
+        self.Point = point
+        self.X = point.x
+        self.Y = point.y
+        self.Z = point.z
+
+
+class Edge(object):
+    # A line segment between two local points, or an arc given by its center, radius and
+    # angles in a plane parallel to XY. Points are returned in the shape coordinates.
+
+    def __init__(self, shape, key, points=None, circle=None):
+        self._shape = shape
+        self._key = key
+        self._points = points
+        self._circle = circle
+        self.Curve = Circle() if circle else LineSegment()
+
+    @property
+    def Vertexes(self):
+        if self._circle:
+            points = self.discretize(2)
+            return [Vertex(points[0]), Vertex(points[-1])]
+        return [Vertex(self._shape._transform(p)) for p in self._points]
+
+    def hashCode(self):
+        return hash(self._key) & 0xffffffff
+
+    def discretize(self, Number=None, Deflection=None):
+        if self._circle:
+            (cx, cy, cz), r, a0, a1 = self._circle
+            if Number is None:
+                # the count of points giving a sagitta below the deflection
+                angle = 2 * math.acos(max(-1.0, 1 - Deflection / r)) if Deflection < r else math.pi
+                Number = max(2, int(math.ceil(abs(a1 - a0) / angle)) + 1)
+            points = []
+            for i in range(Number):
+                a = a0 + (a1 - a0) * i / (Number - 1)
+                points.append(Vector(cx + r * math.cos(a), cy + r * math.sin(a), cz))
+        else:
+            a, b = self._points
+            n = Number or 2
+            points = [Vector(a.x + (b.x - a.x) * i / (n - 1), a.y + (b.y - a.y) * i / (n - 1),
+                             a.z + (b.z - a.z) * i / (n - 1)) for i in range(n)]
+        return [self._shape._transform(p) for p in points]
+
+
+class Wire(object):
+
+    def __init__(self, shape, points):
+        self._shape = shape
+        self._points = points
+
+    @property
+    def OrderedVertexes(self):
+        return [Vertex(self._shape._transform(p)) for p in self._points]
+
+
+class Face(object):
+    # A planar polygon given by its ordered local points or a cylinder patch given by its
+    # axis position, radius, angles and heights. Holes only change the count of wires.
+
+    def __init__(self, shape, planar=None, patch=None, holes=0, edgekeys=(), reverse=False):
+        self._shape = shape
+        # faces are added to the shape once built, this is the index of the face in the shape
+        self._index = len(shape._faces)
+        self._planar = planar
+        self._patch = patch
+        self._holes = holes
+        self._edgekeys = edgekeys
+        self._reverse = reverse
+        self.Surface = Plane() if planar is not None else Cylinder()
+        self.Surface.parameter = self._getParameter
+
+    @property
+    def Wires(self):
+        return [self.OuterWire] + [Wire(self._shape, []) for i in range(self._holes)]
+
+    @property
+    def OuterWire(self):
+        return Wire(self._shape, self._planar)
+
+    @property
+    def Edges(self):
+        return [self._shape._edges[key] for key in self._edgekeys]
+
+    @property
+    def BoundBox(self):
+        return BoundBox(self._getPoints())
+
+    def normalAt(self, u, v):
+        return self._shape._rotate(self._getLocalNormal(u, v))
+
+    def tessellate(self, tolerance, refine=False):
+        tolerance = self._shape._mesh(self._index, tolerance, refine)
+        if self._planar is not None:
+            points = [self._shape._transform(p) for p in self._planar]
+            triangles = [(0, i + 1, i) if self._reverse else (0, i, i + 1) for i in range(1, len(points) - 1)]
+            return points, triangles
+        return self._getGridPoints(tolerance)
+
+    def getUVNodes(self):
+        # the (u, v) parameters of the nodes of the face triangulation, in the order of the tessellated points
+        tolerance = self._shape._triangulation.get(self._index)
+        if tolerance is None:
+            raise RuntimeError('Face has no triangulation')
+        if self._planar is not None:
+            return [(0.0, 0.0)] * len(self._planar)
+        uvs, triangles = self._getGrid(tolerance)
+        return uvs
+
+    def _getLocalNormal(self, u=0.0, v=0.0):
+        if self._planar is not None:
+            a, b, c = self._planar[0], self._planar[1], self._planar[2]
+            n = b.sub(a).cross(c.sub(a))
+            n = n.multiply(1.0 / n.Length)
+        else:
+            n = Vector(math.cos(u), math.sin(u), 0.0)
+        if self._reverse:
+            n = Vector(-n.x, -n.y, -n.z)
+        return n
+
+    def _getParameter(self, point):
+        if self._planar is not None:
+            return 0.0, 0.0
+        (cx, cy), r, a0, a1, z0, z1 = self._patch
+        q = self._shape.Placement.inverse().multVec(point)
+        u = math.atan2(q.y - cy, q.x - cx)
+        if u < min(a0, a1) - 1e-9:
+            u += 2 * math.pi
+        return u, q.z
+
+    def _getPoints(self):
+        if self._planar is not None:
+            return [self._shape._transform(p) for p in self._planar]
+        return self._getGridPoints(1.0)[0]
+
+    def _getGridPoints(self, tolerance):
+        (cx, cy), r, a0, a1, z0, z1 = self._patch
+        uvs, triangles = self._getGrid(tolerance)
+        points = [self._shape._transform(Vector(cx + r * math.cos(u), cy + r * math.sin(u), v)) for u, v in uvs]
+        return points, triangles
+
+    def _getGrid(self, tolerance):
+        # the (u, v) nodes and the triangles of a grid whose chords are within the tolerance
+        (cx, cy), r, a0, a1, z0, z1 = self._patch
+        angle = 2 * math.acos(max(-1.0, 1 - tolerance / r)) if tolerance < r else math.pi
+        nu = max(1, int(math.ceil(abs(a1 - a0) / angle)))
+        nv = max(1, int(math.ceil((z1 - z0) / (8 * tolerance))))
+        uvs = []
+        for j in range(nv + 1):
+            for i in range(nu + 1):
+                uvs.append((a0 + (a1 - a0) * i / nu, z0 + (z1 - z0) * j / nv))
+        triangles = []
+        for j in range(nv):
+            for i in range(nu):
+                p = j * (nu + 1) + i
+                q = p + nu + 1
+                first, second = (p, p + 1, q + 1), (p, q + 1, q)
+                if self._reverse:
+                    first, second = first[::-1], second[::-1]
+                triangles += [first, second]
+        return uvs, triangles
+
+
+class Shape(object):
+    # A Part.Shape built from its specification: a grid of planar faces or the faces of a
+    # cylinder, with loose lines and arcs. Points are moved by the shape placement.
+
+    def __init__(self, spec, placement=None, triangulation=None):
+        self._spec = spec
+        self.Placement = placement or Placement()
+        # the tolerance of each meshed face, shared with the shapes of the same object like OCC does
+        self._triangulation = {} if triangulation is None else triangulation
+        self._build()
+
+    @property
+    def Faces(self):
+        return list(self._faces)
+
+    @property
+    def Edges(self):
+        return list(self._edges.values()) + list(self._loose)
+
+    @property
+    def Vertexes(self):
+        return [v for e in self.Edges for v in e.Vertexes]
+
+    @property
+    def BoundBox(self):
+        points = []
+        for face in self._faces:
+            points += face._getPoints()
+        for edge in self._loose:
+            points += edge.discretize(5)
+        return BoundBox(points)
+
+    def copy(self, copyGeom=True, copyMesh=False):
+        return Shape(self._spec, self.Placement.copy(), dict(self._triangulation) if copyMesh else None)
+
+    def isNull(self):
+        return False
+
+    def clean(self):
+        self._triangulation.clear()
+
+    def tessellate(self, tolerance, refine=False):
+        if refine:
+            self.clean()
+        points = []
+        triangles = []
+        for face in self._faces:
+            p, t = face.tessellate(tolerance)
+            offset = len(points)
+            points += p
+            triangles += [(a + offset, b + offset, c + offset) for a, b, c in t]
+        return points, triangles
+
+    def exportBrepToString(self):
+        # like recent OCC versions, the triangulation of the shape is written with its geometry
+        matrix = self.Placement.toMatrix().A
+        return json.dumps([self._spec, [round(x, 12) for x in matrix], sorted(self._triangulation.items())],
+                          sort_keys=True)
+
+    def hashCode(self):
+        return id(self)
+
+    def _mesh(self, index, tolerance, refine):
+        # the tolerance used to mesh a face: an existing finer triangulation is kept unless it is cleaned
+        if refine:
+            self._triangulation.pop(index, None)
+        current = self._triangulation.get(index)
+        if current is None or current > tolerance:
+            self._triangulation[index] = tolerance
+        return self._triangulation[index]
+
+    def _transform(self, point):
+        return self.Placement.multVec(point)
+
+    def _rotate(self, vector):
+        return self.Placement.Rotation.multVec(vector)
+
+    def _build(self):
+        spec = self._spec
+        self._faces = []
+        self._edges = {}
+        self._loose = []
+        if spec.get('kind') == 'grid':
+            self._buildGrid(spec)
+        elif spec.get('kind') == 'cylinder':
+            self._buildCylinder(spec)
+        for i in range(spec.get('lines', 0)):
+            self._loose.append(Edge(self, ('loose', i), points=(Vector(0, 0, i * 5.0), Vector(100.0, 0, i * 5.0))))
+        for i in range(spec.get('arcs', 0)):
+            self._loose.append(Edge(self, ('arc', i), circle=((0.0, 0.0, -10.0 - i), 20.0 + i, 0.0, math.pi)))
+
+    def _buildGrid(self, spec):
+        # square faces sharing their edges, some of them are reversed or start at another corner
+        count = spec['faces']
+        size = spec.get('size', 10.0)
+        seed = spec.get('seed', 0)
+        columns = max(1, int(math.sqrt(count)))
+        rows = int(math.ceil(count / columns))
+        c = 0
+        for j in range(rows):
+            for i in range(columns):
+                if c >= count:
+                    break
+                points = [Vector(i * size, j * size, 0), Vector((i + 1) * size, j * size, 0),
+                          Vector((i + 1) * size, (j + 1) * size, 0), Vector(i * size, (j + 1) * size, 0)]
+                reverse = (i * 7 + j * 3 + seed) % 3 == 0
+                if (i + j) % 2:
+                    points = points[1:] + points[:1]
+                keys = [self._addSegment(points[k], points[(k + 1) % 4]) for k in range(4)]
+                holes = 1 if spec.get('holes') and c % 5 == 4 else 0
+                self._faces.append(Face(self, planar=points, edgekeys=keys, reverse=reverse, holes=holes))
+                c += 1
+
+    def _buildCylinder(self, spec):
+        # the side of a cylinder cut in patches by seam lines, with arcs at the bottom and the top
+        count = spec['faces']
+        r = spec.get('radius', 50.0)
+        h = spec.get('height', 100.0)
+        for i in range(count):
+            a0 = 2 * math.pi * i / count
+            a1 = 2 * math.pi * (i + 1) / count
+            seam = ('seam', i)
+            if seam not in self._edges:
+                self._edges[seam] = Edge(self, seam, points=(Vector(r * math.cos(a0), r * math.sin(a0), 0),
+                                                             Vector(r * math.cos(a0), r * math.sin(a0), h)))
+            bottom = ('bottom', i)
+            self._edges[bottom] = Edge(self, bottom, circle=((0.0, 0.0, 0.0), r, a0, a1))
+            top = ('top', i)
+            self._edges[top] = Edge(self, top, circle=((0.0, 0.0, h), r, a0, a1))
+            following = ('seam', (i + 1) % count)
+            if following not in self._edges:
+                self._edges[following] = Edge(self, following, points=(Vector(r * math.cos(a1), r * math.sin(a1), 0),
+                                                                       Vector(r * math.cos(a1), r * math.sin(a1), h)))
+            self._faces.append(Face(self, patch=((0.0, 0.0), r, a0, a1, 0.0, h), edgekeys=[seam, bottom, top, following]))
+
+    def _addSegment(self, a, b):
+        # edges are shared by the faces having the same end points
+        key = tuple(sorted((_getKey(a), _getKey(b))))
+        if key not in self._edges:
+            self._edges[key] = Edge(self, key, points=(a, b))
+        return key
+
+
+class MeshKernel(object):
+    # A Mesh.Mesh given by its local points and facets, moved by its placement
+
+    def __init__(self, points, facets, placement=None):
+        self._points = points
+        self._facets = facets
+        self.Placement = placement or Placement()
+
+    @property
+    def Topology(self):
+        return [self.Placement.multVec(p) for p in self._points], [tuple(f) for f in self._facets]
+
+    def write(self, Filename=None, Format=None, **kwargs):
+        # like FreeCAD, the native format holds the mesh kernel without the placement
+        with io.open(Filename, 'wb') as f:
+            f.write(getMeshData(self._points, self._facets))
+
+
+class DocumentObject(object):
+    # A document object rebuilt from its specification, with the properties used by the importer
+
+    derived = {'Part::Feature': {'Part::Feature', 'App::DocumentObject', 'App::GeoFeature'},
+               'Mesh::Feature': {'Mesh::Feature', 'App::DocumentObject', 'App::GeoFeature'},
+               'App::MaterialObjectPython': {'App::MaterialObject', 'App::MaterialObjectPython', 'App::DocumentObject'},
+               'App::DocumentObjectGroup': {'App::DocumentObjectGroup', 'App::DocumentObject'},
+               'App::Link': {'App::Link', 'App::DocumentObject'}}
+
+    def __init__(self, document, spec):
+        self._document = document
+        self._spec = spec
+        self.Name = spec['name']
+        self.Label = spec.get('label', spec['name'])
+        self.TypeId = spec['type']
+        p = spec.get('placement', [0, 0, 0, 0, 0, 0, 1])
+        self.Placement = Placement(Vector(*p[:3]), Rotation(tuple(p[3:])))
+        self.PropertiesList = ['Label', 'Label2', 'Placement']
+        if 'material' in spec:
+            self.PropertiesList.append('Material')
+        if 'materialfaces' in spec:
+            self.PropertiesList.append('MaterialFaces')
+            self.MaterialFaces = spec['materialfaces']
+        if self.TypeId == 'Part::Feature':
+            self.PropertiesList.append('Shape')
+        if self.TypeId == 'Mesh::Feature':
+            self.PropertiesList.append('Mesh')
+        if 'nodes' in spec:
+            self.Material = spec['nodes']
+        self.Group = []
+        # the triangulation is kept by the document object and shared with the shapes it returns
+        self._triangulation = {}
+
+    @property
+    def Shape(self):
+        return Shape(self._spec['shape'], self.Placement.copy(), self._triangulation)
+
+    @property
+    def Mesh(self):
+        points, facets = getMeshGrid(self._spec['mesh'])
+        return MeshKernel(points, facets, self.Placement.copy())
+
+    @property
+    def LinkedObject(self):
+        return self._document.getObject(self._spec['link']) if 'link' in self._spec else self
+
+    def isDerivedFrom(self, type):
+        return type in self.derived.get(self.TypeId, {self.TypeId})
+
+    def getPropertyByName(self, name):
+        if name == 'Label2':
+            return self._spec.get('label2', '')
+        return getattr(self, name)
+
+    def getLinkedObject(self, recursive=True):
+        obj = self
+        while 'link' in obj._spec:
+            obj = obj._document.getObject(obj._spec['link'])
+            if not recursive:
+                break
+        return obj
+
+    def __getattr__(self, name):
+        # the Material property of a Part is a link to the material object
+        if name == 'Material' and 'material' in self._spec:
+            return self._document.getObject(self._spec['material'])
+        raise AttributeError(name)
+
+
+class Document(object):
+
+    def __init__(self, path, specs, name):
+        self.Name = name
+        self.FileName = path
+        self.Objects = [DocumentObject(self, spec) for spec in specs]
+        self._objects = {obj.Name: obj for obj in self.Objects}
+        for spec in specs:
+            if 'group' in spec:
+                self._objects[spec['name']].Group = [self._objects[name] for name in spec['group']]
+
+    def getObject(self, name):
+        return self._objects.get(name)
+
+
+# the open documents by Name
+_documents = {}
+_count = 0
+
+
+def getMeshGrid(spec):
+    # the local points and facets of a wavy grid of the given count of triangles
+    count = spec['triangles'] // 2
+    columns = max(1, int(math.sqrt(count)))
+    rows = int(math.ceil(count / columns))
+    points = [Vector(i, j, math.sin(i * 0.1) * math.cos(j * 0.1)) for j in range(rows + 1) for i in range(columns + 1)]
+    facets = []
+    for j in range(rows):
+        for i in range(columns):
+            p = j * (columns + 1) + i
+            q = p + columns + 1
+            facets += [(p, p + 1, q + 1), (p, q + 1, q)]
+    return points, facets[:spec['triangles']]
+
+def getMeshData(points, facets):
+    # the mesh in the FreeCAD native format (.bms) with its bounding box
+    box = BoundBox(points)
+    data = [struct.pack('<II', 0xA0B0C0D0, 0x010000),
+            b'MESH-POINTS-FACETS'.ljust(256, b'\0'),
+            struct.pack('<II', len(points), len(facets)),
+            b''.join(struct.pack('<fff', p.x, p.y, p.z) for p in points),
+            b''.join(struct.pack('<IIIIII', f[0], f[1], f[2], 0xffffffff, 0xffffffff, 0xffffffff) for f in facets),
+            struct.pack('<ffffff', box.XMin, box.XMax, box.YMin, box.YMax, box.ZMin, box.ZMax)]
+    return b''.join(data)
+
+def open(path):
+    global _count
+    _count += 1
+    with zipfile.ZipFile(path) as zdoc:
+        specs = json.loads(zdoc.read('Synthetic.json'))
+    document = Document(path, specs, f"Doc{_count}")
+    _documents[document.Name] = document
+    return document
+
+def closeDocument(name):
+    _documents.pop(name, None)
+
+def install(package=None):
+    # the FreeCAD, Part and Mesh modules are replaced, the FreeCAD module of the add-on package too
+    freecad = types.ModuleType('FreeCAD')
+    for name in ('Vector', 'Placement', 'Rotation', 'Matrix', 'open', 'closeDocument'):
+        setattr(freecad, name, globals()[name])
+    part = types.ModuleType('Part')
+    for name in ('Line', 'LineSegment', 'Circle', 'Plane', 'Cylinder', 'Shape', 'Face', 'Edge'):
+        setattr(part, name, globals()[name])
+    mesh = types.ModuleType('Mesh')
+    mesh.Mesh = MeshKernel
+    sys.modules['FreeCAD'] = freecad
+    sys.modules['Part'] = part
+    sys.modules['Mesh'] = mesh
+    if package:
+        sys.modules[package + '.FreeCAD'] = freecad
+    return freecad
+
+def _getKey(point):
+    return round(point.x, 9), round(point.y, 9), round(point.z, 9)